@@ -1,12 +1,17 @@
+import time
+
+# 이번 재실행 시작 시각 (import 포함). 프로세스의 첫 실행은 콜드 스타트로 따로 기록합니다.
+rerun_started = time.perf_counter()
+
 import streamlit as st
 import pandas as pd
-import yfinance as yf
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
-import time
-import threading
-import schedule
+import numpy as np
+from datetime import datetime
 import json
+import os
+
+# 탭 전용 모듈(목표 역산 · 포트폴리오 · 파라미터 비교 · 롤링 · 몬테카를로 · 차트 축소)은 그 모듈을 쓰는 탭 분기나 함수 안에서 불러옵니다.
+from krw import config, data, engine, metrics, pipeline, simulation
 
 # ========================#
 # 1. 페이지 및 인증 설정  #
@@ -17,6 +22,10 @@ st.set_page_config(
     layout="wide"
 )
 
+# 이번 재실행에서 열린 계측 구간을 디버그 패널에 보여 주기 위해 기록 시작
+rerun_trace = metrics.REGISTRY.start_trace()
+metrics.REGISTRY.observe("imports", (time.perf_counter() - rerun_started) * 1000)
+
 # --- 암호 보호 ---
 PASSWORD = "secret123"
 if "authenticated" not in st.session_state:
@@ -107,8 +116,12 @@ else:
         st.sidebar.warning("티커를 입력해주세요.")
 
 # 해외 투자(달러 전환 적용) 여부  
+def is_overseas_ticker(ticker_symbol):
+    # 달러로 거래되는 자산 (원/달러 자체와 국내·유럽 상장 종목 제외)
+    return ticker_symbol not in ["USDKRW=X"] and not ticker_symbol.endswith((".KS", ".KQ", ".L", ".MI"))
+
 overseas_investment = False
-if asset_ticker not in ["USDKRW=X"] and not asset_ticker.endswith((".KS", ".KQ", ".L", ".MI")):
+if is_overseas_ticker(asset_ticker):
     overseas_investment = st.sidebar.checkbox("해외 투자 (달러 전환 적용)", value=False)
 
 # --- 시뮬레이션 기본 설정 ---
@@ -126,6 +139,10 @@ interval_option = st.sidebar.selectbox(
     index=2
 )
 
+# 납입 간격별 날짜 격자 주기 / 1회 연 환산 기간
+interval_freq_map = config.INTERVAL_FREQ_MAP
+interval_years_map = config.INTERVAL_YEARS_MAP
+
 # 기준 날짜 (만기일)
 today_date = datetime.today().date()
 if "date_input" not in st.session_state:
@@ -140,19 +157,7 @@ investment_per_period = st.sidebar.number_input(
     format="%d"
 )
 
-total_years_map = {
-    "1일": 1/365,
-    "1주일": 1/52,
-    "1개월": 1/12,
-    "6개월": 0.5,
-    "1년": 1,
-    "3년": 3,
-    "5년": 5,
-    "7년": 7,
-    "10년": 10,
-    "15년": 15,
-    "20년": 20
-}
+total_years_map = config.TOTAL_YEARS_MAP
 total_period_years = total_years_map[time_range]
 
 if total_period_years < 1:
@@ -235,167 +240,269 @@ if uploaded_file is not None:
     except Exception as e:
         st.sidebar.error(f"설정 파일 로드 오류: {e}")
 
+show_debug_panel = st.sidebar.checkbox("디버그 패널 (구간별 소요 시간)", value=False)
+
 # ========================#
 # 4. 캐싱 및 데이터 함수   #
 # ========================#
-@st.cache_data(ttl=3600)
+@st.cache_resource
+def get_price_source():
+    # 프로세스 전체가 공유하는 가격 공급자 (로컬 저장소 + 번들 krw.csv + 캐시)
+    # 확정된 과거 구간은 영구 캐시, 오늘 봉과 최신 가격만 5분 TTL 로 갱신
+    return data.PriceSource(live_ttl=300)
+
 def get_price_data_range(ticker_symbol, start, end):
-    ticker = yf.Ticker(ticker_symbol)
-    hist = ticker.history(start=start, end=end)
-    return hist
+    return get_price_source().history(ticker_symbol, start, end)
+
+def get_price_data_many(ticker_symbols, start, end):
+    return get_price_source().history_many(ticker_symbols, start, end)
 
-@st.cache_data(ttl=300)
 def get_latest_price(ticker_symbol):
-    ticker = yf.Ticker(ticker_symbol)
-    latest_data = ticker.history(period="1d")
-    if not latest_data.empty:
-        return latest_data['Close'].iloc[-1]
-    else:
-        return None
+    return get_price_source().latest(ticker_symbol)
+
+def get_simulation_inputs(ticker_symbol, start, end, apply_fx):
+    return get_price_source().inputs(ticker_symbol, start, end, apply_fx)
 
 # ========================#
 # 5. 데이터 자동 업데이트  #
 # ========================#
-def update_data():
-    st.cache_data.clear()
-    st.session_state.next_update = datetime.now() + timedelta(hours=1)
+@st.cache_resource
+def get_refresh_service():
+    # 프로세스당 하나만 생성되는 백그라운드 갱신 서비스 (1시간 간격)
+    from krw import refresh
 
-def run_scheduler():
-    schedule.every(1).hour.do(update_data)
-    while True:
-        schedule.run_pending()
-        time.sleep(60)
+    service = refresh.RefreshService(get_price_source().refresh, interval_seconds=3600)
+    service.start()
+    return service
 
-if 'scheduler_started' not in st.session_state:
-    st.session_state.scheduler_started = True
-    st.session_state.next_update = datetime.now() + timedelta(hours=1)
-    threading.Thread(target=run_scheduler, daemon=True).start()
+refresh_service = get_refresh_service()
+refresh_service.touch(asset_ticker, "USDKRW=X" if overseas_investment else None)
 
 # ===================================#
 # 6. 시뮬레이션 계산 함수 (모듈화)       #
 # ===================================#
-def run_simulation(investment_amt, interest_rate, compound_rate):
-    months_total = int(round(total_period_years * 12))
-    end_date = pd.to_datetime(selected_date)
-    start_date = end_date - pd.DateOffset(months=months_total)
-    start_str = start_date.strftime("%Y-%m-%d")
-    min_data_date = pd.to_datetime("2003-12-01")
-    
-    with st.spinner("기간 데이터 불러오는 중입니다..."):
-        price_data = get_price_data_range(asset_ticker, start=start_str, end=(end_date + pd.DateOffset(days=1)).strftime("%Y-%m-%d"))
-    
-    if price_data.empty:
-        st.error("가격 데이터를 불러올 수 없습니다.")
+def simulation_window():
+    return config.simulation_window(config.normalize_config(get_config_dict()))
+
+@st.cache_resource
+def get_pipeline():
+    # 프로세스 전체가 공유하는 단계별 계산 캐시 (격자 정렬 → 납입 누적 → 이자율 적용 → 차트)
+    return pipeline.Pipeline(maxsize=32)
+
+@st.cache_resource
+def get_app_runs():
+    # 이 프로세스에서 스크립트가 실행된 횟수 (0 이면 이번 실행이 콜드 스타트)
+    return {"count": 0}
+
+def run_pipeline(investment_amt):
+    # 데이터(동시 요청) → 격자 정렬 → 납입 누적 → 이자율 적용. 바뀐 설정 항목의 단계부터만 다시 계산
+    sim_config = {**get_config_dict(), "investment_per_period": investment_amt}
+    try:
+        with st.spinner("기간 데이터 불러오는 중입니다..."):
+            staged = pipeline.run_stages(get_pipeline(), sim_config, get_simulation_inputs)
+    except ValueError as e:
+        st.error(str(e))
         st.stop()
-    
-    if price_data.index.tz is not None:
-        tz_info = price_data.index.tz
-        if start_date.tzinfo is None:
-            start_date = start_date.tz_localize(tz_info)
-        if end_date.tzinfo is None:
-            end_date = end_date.tz_localize(tz_info)
-    
-    data_min_date = price_data.index.min()
+    for message in staged["prepared"]["warnings"]:
+        st.warning(message)
+    return staged
+
+def prepare_simulation(investment_amt):
+    return run_pipeline(investment_amt)["prepared"]
+
+def run_scenarios(prepared, interest_rates, compound_rates):
+    return simulation.run_scenarios(prepared, interest_rates, compound_rates)
+
+def scenario_result(prepared, scenarios, i):
+    return simulation.scenario_result(prepared, scenarios, i)
+
+def run_simulation(investment_amt, interest_rate, compound_rate):
+    prepared = prepare_simulation(investment_amt)
+    return scenario_result(prepared, run_scenarios(prepared, [interest_rate], [compound_rate]), 0)
+
+def prepare_portfolio(portfolio_weights, investment_amt, apply_fx):
+    # 여러 티커를 한 번에 불러와 공통 날짜 격자에 한 번 정렬한 뒤 (날짜 × 자산) 행렬로 시뮬레이션
+    from krw import portfolio
+
+    tickers = list(portfolio_weights)
+    fx_columns = [apply_fx and is_overseas_ticker(t) for t in tickers]
+    fetch_tickers = tickers + (["USDKRW=X"] if any(fx_columns) and "USDKRW=X" not in tickers else [])
+
+    start_date, end_date, start_str, end_str = simulation_window()
+    with st.spinner("포트폴리오 데이터 불러오는 중입니다..."):
+        frames = get_price_data_many(fetch_tickers, start_str, end_str)
+
+    missing = [t for t in fetch_tickers if frames[t].empty]
+    if missing:
+        st.error(f"가격 데이터를 불러올 수 없습니다: {', '.join(missing)}")
+        return None
+
+    # 모든 자산의 데이터가 있는 날부터 시작
+    data_min_date = max(frames[t].index.min().tz_localize(None).normalize() if frames[t].index.tz is not None else frames[t].index.min().normalize() for t in fetch_tickers)
     if start_date < data_min_date:
-        st.warning(f"선택한 운용 기간이 데이터 범위를 벗어납니다. 적립 시작일을 {data_min_date.strftime('%Y년 %m월 %d일')}로 조정합니다.")
+        st.warning(f"선택한 운용 기간이 일부 자산의 데이터 범위를 벗어납니다. 적립 시작일을 {data_min_date.strftime('%Y년 %m월 %d일')}로 조정합니다.")
         start_date = data_min_date
 
-    if interval_option == "1일":
-        freq = "D"
-    elif interval_option == "1주":
-        freq = "W"
-    elif interval_option == "1개월":
-        freq = "MS"
-    elif interval_option == "1년":
-        freq = "AS"
-    
-    all_dates = pd.date_range(start=start_date, end=end_date, freq=freq, tz=price_data.index.tz)
-    sampled_data = price_data.reindex(all_dates, method='ffill')
-    
-    if overseas_investment:
-        usdkrw_data = get_price_data_range("USDKRW=X", start=start_str, end=(end_date + pd.DateOffset(days=1)).strftime("%Y-%m-%d"))
-        usdkrw_data = usdkrw_data.reindex(all_dates, method='ffill')
-    
-    months_purchase = int(round(purchase_period_years * 12))
-    purchase_end_date = start_date + pd.DateOffset(months=months_purchase)
-    purchase_dates = pd.date_range(start=start_date, end=purchase_end_date, freq=freq, tz=price_data.index.tz, inclusive='left')
-    purchase_data = price_data.reindex(purchase_dates, method='ffill')
-    if overseas_investment:
-        usdkrw_purchase = usdkrw_data.reindex(purchase_dates, method='ffill')
-    
-    total_investment_purchase = investment_amt * len(purchase_dates)
-    cumulative_effective_prices = []
-    cumulative_reciprocal = 0.0
-    
-    if overseas_investment:
-        effective_purchase_prices = usdkrw_purchase['Close'] * purchase_data['Close']
-        for i, price in enumerate(effective_purchase_prices):
-            cumulative_reciprocal += 1 / price
-            cumulative_effective_prices.append((i + 1) / cumulative_reciprocal)
-        total_units_purchase = (investment_amt / effective_purchase_prices).sum()
-    else:
-        for i, price in enumerate(purchase_data['Close']):
-            cumulative_reciprocal += 1 / price
-            cumulative_effective_prices.append((i + 1) / cumulative_reciprocal)
-        total_units_purchase = (investment_amt / purchase_data['Close']).sum()
-    
-    final_effective_price_purchase = total_investment_purchase / total_units_purchase
-    
-    final_units_after_contract = total_units_purchase * (1 + interest_rate/100)
-    if conversion_period_years > 0:
-        final_units_final = final_units_after_contract * ((1 + compound_rate/100) ** conversion_period_years)
-    else:
-        final_units_final = final_units_after_contract
-    
-    base_price = sampled_data.iloc[-1]['Close']
+    freq = interval_freq_map[interval_option]
+    all_dates = pd.date_range(start=start_date, end=end_date, freq=freq)
+    purchase_end_date = start_date + pd.DateOffset(months=int(round(purchase_period_years * 12)))
+    n_purchases = len(pd.date_range(start=start_date, end=purchase_end_date, freq=freq, inclusive='left'))
+
+    close_matrix = portfolio.align_close_matrix(frames, fetch_tickers, all_dates)
+    asset_matrix = close_matrix[:, :len(tickers)]
+    fx_mask = np.array(fx_columns)
+    if fx_mask.any():
+        fx_series = close_matrix[:, fetch_tickers.index("USDKRW=X")]
+        asset_matrix = np.where(fx_mask, asset_matrix * fx_series[:, None], asset_matrix)
+
+    base_prices = close_matrix[-1, :len(tickers)]
+    if fx_mask.any():
+        base_prices = np.where(fx_mask, base_prices * (get_latest_price("USDKRW=X") or 1), base_prices)
+
+    result = portfolio.simulate_portfolio(
+        asset_matrix[:n_purchases],
+        [portfolio_weights[t] for t in tickers],
+        investment_amt,
+        interest_rate_percent,
+        compound_interest_rate_percent,
+        conversion_period_years,
+        base_prices,
+    )
+    result["tickers"] = tickers
+    result["start_date"] = start_date
+    return result
+
+def rolling_inputs(history_start):
+    # 롤링 백테스트용: 자산의 전체 이력을 현재 납입 간격 격자에 맞춘 원화 환산 가격
+    # 이력 조회 시작일이 색인 범위 안이면 저장된 1/가격 누적합 색인(krw.prefix)의 격자를 잘라 씁니다.
+    from krw import fx, prefix
+
+    if history_start >= prefix.INDEX_START:
+        price_index = get_price_source().reciprocal_index(asset_ticker, interval_freq_map[interval_option], overseas_investment)
+        if price_index is not None:
+            grid = price_index.grid
+            lo = grid.searchsorted(pd.Timestamp(history_start).tz_localize(grid.tz))
+            prices = np.asarray(price_index.prices[lo:])
+            valid = np.flatnonzero(np.isfinite(prices) & (prices > 0))
+            if len(valid) == 0:
+                return None, None
+            return grid[lo + valid[0]:], prices[valid[0]:]
+    end_str = (pd.Timestamp.today().normalize() + pd.DateOffset(days=1)).strftime("%Y-%m-%d")
+    price_data = get_price_data_range(asset_ticker, start=history_start, end=end_str)
+    if price_data.empty:
+        return None, None
+    close = price_data['Close']
     if overseas_investment:
-        latest_exchange_rate = get_latest_price("USDKRW=X") or 1
-        base_effective_price = base_price * latest_exchange_rate
-        final_holding_value = final_units_final * base_effective_price
-    else:
-        final_holding_value = final_units_final * base_price
-    
-    profit_rate = ((final_holding_value - total_investment_purchase) / total_investment_purchase) * 100
+        usdkrw_close = get_price_data_range("USDKRW=X", start=fx.fx_start(history_start), end=end_str)['Close']
+        close = close * usdkrw_close.reindex(close.index, method='ffill')
+        close = close.dropna()
+    grid = pd.date_range(start=close.index.min(), end=close.index.max(), freq=interval_freq_map[interval_option], tz=close.index.tz)
+    return grid, close.reindex(grid, method='ffill').to_numpy()
+
+def projection_history():
+    # 몬테카를로 수익률 표본: 운용 기간 끝까지의 전체 이력(1/가격 색인의 격자 가격)과 그 지문
+    # 색인을 쓸 수 없으면 운용 기간의 격자 가격으로 대신합니다.
+    price_index = get_price_source().reciprocal_index(asset_ticker, interval_freq_map[interval_option], overseas_investment)
+    if price_index is None:
+        return prepared_base["effective_price_series"], None
+    last = price_index.last_position(prepared_base["end_date"])
+    return np.asarray(price_index.prices[:last + 1]), price_index.fingerprint
+
+def run_forward_projection(method, n_paths, block_size, seed=0):
+    # 같은 준비 결과(이자율 단계 키) · 표본 이력 · 경로 설정이면 재실행 사이에 단계 캐시의 결과를 그대로 씁니다.
+    history_prices, history_key = projection_history()
+    key = ("monte_carlo", staged["keys"]["rates"], history_key, method, n_paths, block_size, seed)
+    return get_pipeline().run("presentation", key, lambda: forward_projection(history_prices, method, n_paths, block_size, seed))
+
+def forward_projection(history_prices, method, n_paths, block_size, seed):
+    # 기준 날짜 이후 전체 운용 기간만큼의 미래 가격 경로를 만들어 현재 계획을 적용
+    from krw import montecarlo
+
+    period_years = interval_years_map[interval_option]
+    n_steps = int(round(total_period_years / period_years))
+    with metrics.span("monte_carlo"):
+        projection = montecarlo.run_projection(
+            history_prices,
+            prepared_base["current_effective_price"],
+            n_steps,
+            int(round(purchase_period_years / period_years)),
+            investment_per_period,
+            engine.rate_multiplier(interest_rate_percent, compound_interest_rate_percent, conversion_period_years),
+            n_paths=n_paths,
+            method=method,
+            block_size=block_size,
+            seed=seed,
+        )
+    if projection is None:
+        return None, None
+    # 팬 백분위는 일부 단계(fan_steps)에서만 계산되므로 그 단계의 날짜만 돌려줍니다.
+    future_dates = pd.date_range(start=prepared_base["end_date"], periods=n_steps + 1, freq=interval_freq_map[interval_option])
+    return future_dates[projection["fan_steps"]], projection
+
+# 차트 가로 픽셀 수 기준 표시 점 개수와 WebGL(Scattergl) 전환 기준
+CHART_POINTS = 1200
+WEBGL_MIN_POINTS = 5000
+
+def chart_points(x, y, chart_window, full_resolution):
+    # 보이는 구간만 잘라 내고, 점이 가로 픽셀 수보다 많으면 LTTB 로 줄입니다.
+    from krw import downsample
+
+    window = downsample.window_slice(x, *chart_window)
+    x, y = x[window], np.asarray(y)[window]
+    if not full_resolution:
+        x, y = downsample.downsample(x, y, CHART_POINTS)
+    return x, y
+
+def chart_trace(points, **trace_kwargs):
+    # 큰 트레이스는 WebGL 로 그립니다.
+    import plotly.graph_objects as go
+
+    x, y = points
+    trace_type = go.Scattergl if len(y) >= WEBGL_MIN_POINTS else go.Scatter
+    return trace_type(x=x, y=y, **trace_kwargs)
+
+def price_chart_data(prepared, chart_window, full_resolution):
+    # 화면 표시 단계: 납입 누적 결과와 표시 구간 · 해상도에만 의존 (이자율이 바뀌어도 재사용)
+    from krw import downsample
+
+    prices = chart_points(prepared["sampled_dates"], prepared["effective_price_series"], chart_window, full_resolution)
+    averages = chart_points(prepared["purchase_dates"], prepared["cumulative_effective_prices"], chart_window, full_resolution)
+    visible_prices = prepared["effective_price_series"][downsample.window_slice(prepared["sampled_dates"], *chart_window)]
+    visible_averages = prepared["cumulative_effective_prices"][downsample.window_slice(prepared["purchase_dates"], *chart_window)]
+    y_min = min(min(visible_prices, default=np.inf), min(visible_averages, default=np.inf)) * 0.95
+    y_max = max(max(visible_prices, default=-np.inf), max(visible_averages, default=-np.inf)) * 1.05
+    return {"prices": prices, "averages": averages, "y_range": (y_min, y_max)}
+
+def lazy_tabs(labels):
+    # 선택한 탭만 실행되도록 탭 선택을 재실행으로 처리합니다. (지원하지 않는 Streamlit 에서는 모든 탭 실행)
+    try:
+        return st.tabs(labels, key="main_tabs", on_change="rerun")
+    except TypeError:
+        return st.tabs(labels)
 
-    latest_price = get_latest_price(asset_ticker) or base_price
-    if overseas_investment:
-        latest_exchange_rate = get_latest_price("USDKRW=X") or 1
-        current_effective_price = latest_price * latest_exchange_rate
-    else:
-        current_effective_price = latest_price
-    
-    results = {
-        "total_investment_purchase": total_investment_purchase,
-        "final_holding_value": final_holding_value,
-        "profit_rate": profit_rate,
-        "final_effective_price_purchase": final_effective_price_purchase,
-        "total_units_purchase": total_units_purchase,
-        "base_price": base_price,
-        "current_effective_price": current_effective_price,
-        "sampled_dates": all_dates,
-        "effective_price_series": (sampled_data['Close'] * (usdkrw_data['Close'] if overseas_investment else 1)).values,
-        "cumulative_effective_prices": cumulative_effective_prices,
-        "purchase_dates": purchase_dates,
-        "start_date": start_date,
-        "purchase_end_date": purchase_end_date,
-        "holding_end_date": purchase_end_date + pd.DateOffset(months=int(round(holding_period_years*12))),
-        "end_date": end_date
-    }
-    return results
+def tab_is_open(tab):
+    # 탭 상태를 추적하지 않으면 open 이 없거나 None 이므로 열린 것으로 봅니다.
+    return getattr(tab, "open", None) is not False
+
+def year_steps(bounds, step):
+    return np.round(np.arange(bounds[0], bounds[1] + step / 2, step), 4)
 
 # ===================================#
 # 7. 메인 영역: 시뮬레이션 및 탭 구성     #
 # ===================================#
 st.title("정액 투자 시뮬레이터")
 st.markdown("<div class='small-text'>실시간 가격 기준 성과 예측</div>", unsafe_allow_html=True)
-st.markdown(f"<div class='small-text'>마지막 업데이트: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} | 다음 업데이트: {st.session_state.next_update.strftime('%Y-%m-%d %H:%M:%S')}</div>", unsafe_allow_html=True)
-st.markdown("<div class='warning-text'>⚠️ 현재는 2003년 12월 데이터부터 제공됩니다. 이전 데이터 선택 시 자동으로 시작일이 조정됩니다.</div>", unsafe_allow_html=True)
+refresh_status = refresh_service.status
+st.markdown(f"<div class='small-text'>마지막 업데이트: {refresh_status.last_refresh.strftime('%Y-%m-%d %H:%M:%S')} | 다음 업데이트: {refresh_status.next_refresh.strftime('%Y-%m-%d %H:%M:%S')}</div>", unsafe_allow_html=True)
+st.markdown("<div class='warning-text'>⚠️ 달러(USDKRW=X)는 1990년 3월, 그 외 자산은 Yahoo Finance 제공 시점부터 데이터가 제공됩니다. 이전 데이터 선택 시 자동으로 시작일이 조정됩니다.</div>", unsafe_allow_html=True)
 
-sim_base = run_simulation(investment_per_period, interest_rate_percent, compound_interest_rate_percent)
-sim_optimistic = run_simulation(investment_per_period, interest_rate_percent + risk_adjustment, compound_interest_rate_percent + risk_adjustment)
-sim_pessimistic = run_simulation(investment_per_period, interest_rate_percent - risk_adjustment, compound_interest_rate_percent - risk_adjustment)
+# 기본 / 낙관 / 보수 시나리오는 한 번의 준비 결과 위에서 이자율만 바꿔 계산
+with metrics.span("simulation"):
+    staged = run_pipeline(investment_per_period)
+    prepared_base, scenarios = staged["prepared"], staged["scenarios"]
+    sim_base, sim_optimistic, sim_pessimistic = (scenario_result(prepared_base, scenarios, i) for i in range(3))
 
-tabs = st.tabs(["📊 투자 성과", "📈 가격 및 차트", "🎯 목표 달성 역산"])
+tabs = lazy_tabs(["📊 투자 성과", "📈 가격 및 차트", "🎯 목표 달성 역산", "🧺 포트폴리오", "🧮 파라미터 비교", "🔁 롤링 백테스트"])
 
 with tabs[0]:
     st.subheader("투자 성과 결과")
@@ -421,162 +528,335 @@ with tabs[0]:
     st.markdown(f"<div class='small-text'>납입 기간: {purchase_period_years:.2f}년 | 유지 기간: {holding_period_years:.2f}년 | 전환 기간: {conversion_period_years:.2f}년</div>", unsafe_allow_html=True)
 
 with tabs[1]:
-    st.subheader("가격 추이 및 누적 매입 평균")
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(
-        x=sim_base["sampled_dates"],
-        y=sim_base["effective_price_series"],
-        mode='lines',
-        name='실제 가격',
-        line=dict(width=2, color='#003b70')
-    ))
-    fig.add_trace(go.Scatter(
-        x=sim_base["purchase_dates"],
-        y=sim_base["cumulative_effective_prices"],
-        mode='lines',
-        name='누적 매입 평균 가격',
-        line=dict(dash='dot', width=2, color='#28a745')
-    ))
-    y_min = min(min(sim_base["effective_price_series"]), min(sim_base["cumulative_effective_prices"])) * 0.95
-    y_max = max(max(sim_base["effective_price_series"]), max(sim_base["cumulative_effective_prices"])) * 1.05
-
-    fig.add_shape(
-        type="rect",
-        x0=sim_base["start_date"],
-        y0=y_min,
-        x1=sim_base["purchase_end_date"],
-        y1=y_max,
-        fillcolor="#e6f2ff",
-        opacity=0.3,
-        layer="below",
-        line_width=0
-    )
-    fig.add_shape(
-        type="rect",
-        x0=sim_base["purchase_end_date"],
-        y0=y_min,
-        x1=sim_base["purchase_end_date"] + pd.DateOffset(months=int(round(holding_period_years*12))),
-        y1=y_max,
-        fillcolor="#fff2e6",
-        opacity=0.3,
-        layer="below",
-        line_width=0
-    )
-    fig.add_shape(
-        type="rect",
-        x0=sim_base["purchase_end_date"] + pd.DateOffset(months=int(round(holding_period_years*12))),
-        y0=y_min,
-        x1=sim_base["end_date"],
-        y1=y_max,
-        fillcolor="#e6ffe6",
-        opacity=0.3,
-        layer="below",
-        line_width=0
-    )
-    fig.add_shape(
-        type='line',
-        x0=sim_base["purchase_end_date"],
-        y0=y_min,
-        x1=sim_base["purchase_end_date"],
-        y1=y_max,
-        line=dict(color='#ffa94d', width=2, dash='dash')
-    )
-    fig.add_annotation(
-        x=sim_base["purchase_end_date"],
-        y=y_max * 0.98,
-        text="납입 종료",
-        showarrow=True,
-        arrowhead=1,
-        ax=40,
-        ay=-40,
-        font=dict(size=12, color="#ff8c00")
-    )
-    holding_end_date = sim_base["purchase_end_date"] + pd.DateOffset(months=int(round(holding_period_years*12)))
-    fig.add_shape(
-        type='line',
-        x0=holding_end_date,
-        y0=y_min,
-        x1=holding_end_date,
-        y1=y_max,
-        line=dict(color='#dc3545', width=2, dash='dash')
-    )
-    fig.add_annotation(
-        x=holding_end_date,
-        y=y_max * 0.95,
-        text="유지 종료 & 전환 시작",
-        showarrow=True,
-        arrowhead=1,
-        ax=40,
-        ay=-40,
-        font=dict(size=12, color="#dc3545")
-    )
-    fig.add_trace(go.Scatter(
-        x=[sim_base["purchase_end_date"], sim_base["end_date"]],
-        y=[sim_base["final_effective_price_purchase"], sim_base["final_effective_price_purchase"]],
-        mode='lines',
-        name='최종 평균 매입 가격 (납입 기준)',
-        line=dict(dash='dash', width=2, color='#dc3545')
-    ))
-    fig.update_layout(
-        xaxis=dict(
-            title='날짜',
-            rangeselector=dict(
-                buttons=list([
-                    dict(count=1, label="1년", step="year", stepmode="backward"),
-                    dict(count=3, label="3년", step="year", stepmode="backward"),
-                    dict(step="all")
-                ])
-            ),
-            rangeslider=dict(visible=True),
-            tickformat="%Y년 %m월"
-        ),
-        yaxis=dict(title='가격 (원)', range=[y_min, y_max]),
-        hovermode='x unified',
-        height=500,
-        plot_bgcolor='white',
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5)
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    # 차트 탭이 선택되었을 때만 그림 · 몬테카를로 경로를 만듭니다.
+    if tab_is_open(tabs[1]):
+        import plotly.graph_objects as go
+
+        st.subheader("가격 추이 및 누적 매입 평균")
+        # 기본은 전체 구간을 차트 해상도만큼 줄여 보내고, 구간을 좁히면 그 구간만 원본 해상도로 보냅니다.
+        data_start, data_end = sim_base["sampled_dates"][0].date(), sim_base["sampled_dates"][-1].date()
+        col_chart1, col_chart2 = st.columns([3, 1])
+        with col_chart1:
+            if data_start < data_end:
+                chart_window = st.slider("차트 표시 구간", min_value=data_start, max_value=data_end, value=(data_start, data_end), format="YYYY-MM-DD")
+            else:
+                chart_window = (data_start, data_end)
+        with col_chart2:
+            chart_full_resolution = st.checkbox("전체 해상도", value=False, help=f"끄면 {CHART_POINTS:,}개 점 이내로 줄여서 그립니다.")
+        chart_zoomed = chart_window != (data_start, data_end)
+
+        with metrics.span("chart"):
+            chart_key = (staged["keys"]["accumulate"], chart_window, chart_full_resolution)
+            chart_data = get_pipeline().run("presentation", chart_key, lambda: price_chart_data(prepared_base, chart_window, chart_full_resolution))
+            fig = go.Figure()
+            fig.add_trace(chart_trace(
+                chart_data["prices"],
+                mode='lines',
+                name='실제 가격',
+                line=dict(width=2, color='#003b70')
+            ))
+            fig.add_trace(chart_trace(
+                chart_data["averages"],
+                mode='lines',
+                name='누적 매입 평균 가격',
+                line=dict(dash='dot', width=2, color='#28a745')
+            ))
+            y_min, y_max = chart_data["y_range"]
+
+            # 몬테카를로 미래 경로 (선택)
+            show_projection = st.checkbox("미래 가격 경로 시뮬레이션 (몬테카를로)", value=False)
+            projection = None
+            if show_projection:
+                col_mc1, col_mc2, col_mc3 = st.columns(3)
+                with col_mc1:
+                    mc_method = st.radio("경로 생성 방식", ["bootstrap", "gbm"], format_func={"bootstrap": "과거 수익률 블록 재표본", "gbm": "기하 브라운 운동 (GBM)"}.get, horizontal=True)
+                with col_mc2:
+                    mc_paths = st.number_input("경로 수", min_value=100, max_value=50000, value=10000, step=1000)
+                with col_mc3:
+                    mc_block = st.number_input("블록 길이 (기간)", min_value=1, max_value=120, value=12, step=1)
+                future_dates, projection = run_forward_projection(mc_method, int(mc_paths), int(mc_block))
+                if projection is None:
+                    st.warning("과거 데이터가 부족하거나 가격 변동이 없어 미래 경로를 만들 수 없습니다.")
+                else:
+                    if mc_method == "bootstrap" and projection["block_size"] < mc_block:
+                        st.warning(f"과거 수익률이 {projection['sample_size']:,}개뿐이라 블록 길이를 {projection['block_size']}(으)로 줄였습니다.")
+                    fan = projection["fan"]
+                    fig.add_trace(go.Scatter(x=future_dates, y=fan[95], mode='lines', line=dict(width=0), showlegend=False, hoverinfo='skip'))
+                    fig.add_trace(go.Scatter(x=future_dates, y=fan[5], mode='lines', line=dict(width=0), fill='tonexty', fillcolor='rgba(0, 59, 112, 0.12)', name='예상 경로 5~95%'))
+                    fig.add_trace(go.Scatter(x=future_dates, y=fan[75], mode='lines', line=dict(width=0), showlegend=False, hoverinfo='skip'))
+                    fig.add_trace(go.Scatter(x=future_dates, y=fan[25], mode='lines', line=dict(width=0), fill='tonexty', fillcolor='rgba(0, 59, 112, 0.25)', name='예상 경로 25~75%'))
+                    fig.add_trace(go.Scatter(x=future_dates, y=fan[50], mode='lines', line=dict(width=2, dash='dot', color='#003b70'), name='예상 경로 중앙값'))
+                    y_min = min(y_min, fan[5].min() * 0.95)
+                    y_max = max(y_max, fan[95].max() * 1.05)
+
+            fig.add_shape(
+                type="rect",
+                x0=sim_base["start_date"],
+                y0=y_min,
+                x1=sim_base["purchase_end_date"],
+                y1=y_max,
+                fillcolor="#e6f2ff",
+                opacity=0.3,
+                layer="below",
+                line_width=0
+            )
+            fig.add_shape(
+                type="rect",
+                x0=sim_base["purchase_end_date"],
+                y0=y_min,
+                x1=sim_base["purchase_end_date"] + pd.DateOffset(months=int(round(holding_period_years*12))),
+                y1=y_max,
+                fillcolor="#fff2e6",
+                opacity=0.3,
+                layer="below",
+                line_width=0
+            )
+            fig.add_shape(
+                type="rect",
+                x0=sim_base["purchase_end_date"] + pd.DateOffset(months=int(round(holding_period_years*12))),
+                y0=y_min,
+                x1=sim_base["end_date"],
+                y1=y_max,
+                fillcolor="#e6ffe6",
+                opacity=0.3,
+                layer="below",
+                line_width=0
+            )
+            fig.add_shape(
+                type='line',
+                x0=sim_base["purchase_end_date"],
+                y0=y_min,
+                x1=sim_base["purchase_end_date"],
+                y1=y_max,
+                line=dict(color='#ffa94d', width=2, dash='dash')
+            )
+            fig.add_annotation(
+                x=sim_base["purchase_end_date"],
+                y=y_max * 0.98,
+                text="납입 종료",
+                showarrow=True,
+                arrowhead=1,
+                ax=40,
+                ay=-40,
+                font=dict(size=12, color="#ff8c00")
+            )
+            holding_end_date = sim_base["purchase_end_date"] + pd.DateOffset(months=int(round(holding_period_years*12)))
+            fig.add_shape(
+                type='line',
+                x0=holding_end_date,
+                y0=y_min,
+                x1=holding_end_date,
+                y1=y_max,
+                line=dict(color='#dc3545', width=2, dash='dash')
+            )
+            fig.add_annotation(
+                x=holding_end_date,
+                y=y_max * 0.95,
+                text="유지 종료 & 전환 시작",
+                showarrow=True,
+                arrowhead=1,
+                ax=40,
+                ay=-40,
+                font=dict(size=12, color="#dc3545")
+            )
+            fig.add_trace(go.Scatter(
+                x=[sim_base["purchase_end_date"], sim_base["end_date"]],
+                y=[sim_base["final_effective_price_purchase"], sim_base["final_effective_price_purchase"]],
+                mode='lines',
+                name='최종 평균 매입 가격 (납입 기준)',
+                line=dict(dash='dash', width=2, color='#dc3545')
+            ))
+            fig.update_layout(
+                xaxis=dict(
+                    title='날짜',
+                    rangeselector=dict(
+                        buttons=list([
+                            dict(count=1, label="1년", step="year", stepmode="backward"),
+                            dict(count=3, label="3년", step="year", stepmode="backward"),
+                            dict(step="all")
+                        ])
+                    ),
+                    rangeslider=dict(visible=True),
+                    tickformat="%Y년 %m월"
+                ),
+                yaxis=dict(title='가격 (원)', range=[y_min, y_max]),
+                hovermode='x unified',
+                height=500,
+                plot_bgcolor='white',
+                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5)
+            )
+            if chart_zoomed:
+                fig.update_xaxes(range=[chart_window[0], chart_window[1]])
+            st.plotly_chart(fig, use_container_width=True)
     
-    col_price1, col_price2, col_price3 = st.columns(3)
-    with col_price1:
-        st.metric("현재 가격", f"{sim_base['current_effective_price']:.2f}원")
-    with col_price2:
-        st.metric("기준 날짜 가격", f"{sim_base['base_price'] * (get_latest_price('USDKRW=X') if overseas_investment else 1):.2f}원")
-    with col_price3:
-        st.metric("최종 평균 매입 가격", f"{sim_base['final_effective_price_purchase']:.2f}원")
-    actual_start_date = sim_base["start_date"].strftime("%Y년 %m월 %d일")
-    st.markdown(f"<div class='small-text'>* 실제 사용된 데이터 시작일: {actual_start_date}</div>", unsafe_allow_html=True)
+        col_price1, col_price2, col_price3 = st.columns(3)
+        with col_price1:
+            st.metric("현재 가격", f"{sim_base['current_effective_price']:.2f}원")
+        with col_price2:
+            st.metric("기준 날짜 가격", f"{sim_base['base_effective_price']:.2f}원")
+        with col_price3:
+            st.metric("최종 평균 매입 가격", f"{sim_base['final_effective_price_purchase']:.2f}원")
+        actual_start_date = sim_base["start_date"].strftime("%Y년 %m월 %d일")
+        st.markdown(f"<div class='small-text'>* 실제 사용된 데이터 시작일: {actual_start_date}</div>", unsafe_allow_html=True)
+        if projection is not None:
+            col_mc4, col_mc5, col_mc6 = st.columns(3)
+            with col_mc4:
+                st.metric("미래 만기 가치 중앙값", f"{projection['value_percentiles'][50]:,.0f}원")
+            with col_mc5:
+                st.metric("미래 만기 가치 5% ~ 95%", f"{projection['value_percentiles'][5]:,.0f} ~ {projection['value_percentiles'][95]:,.0f}원")
+            with col_mc6:
+                st.metric("손실 확률", f"{projection['loss_probability'] * 100:.1f}%")
+            st.markdown(f"<div class='small-text'>* 현재 가격에서 시작해 {len(projection['final_holding_value']):,}개 경로로 추정 (총 납입 {projection['total_investment_purchase']:,.0f}원 기준)</div>", unsafe_allow_html=True)
 
 with tabs[2]:
     st.subheader("목표 달성 역산")
-    st.markdown("원하는 만기 자산 가치를 입력하면, 해당 목표 달성을 위해 필요한 매 기간 납입 금액을 계산합니다.")
+    st.markdown("원하는 만기 자산 가치를 입력하면, 해당 목표 달성을 위해 필요한 매 기간 납입 금액 / 약정 이자율 / 납입 횟수를 계산합니다.")
     target_value = st.number_input("목표 만기 자산 가치 (원)", value=100000000, step=1000000, format="%d")
-    
-    def find_required_investment(target, low=1000, high=10000000, tol=1e3, max_iter=30):
-        iteration = 0
-        result = None
-        while iteration < max_iter:
-            mid = (low + high) / 2
-            sim = run_simulation(mid, interest_rate_percent, compound_interest_rate_percent)
-            final_val = sim["final_holding_value"]
-            if abs(final_val - target) < tol:
-                result = mid
-                break
-            if final_val < target:
-                low = mid
-            else:
-                high = mid
-            iteration += 1
-        if result is None:
-            result = mid
-        return result, final_val, iteration
+    goal_seek_targets = {"매 기간 납입 금액": "investment", "약정 이자율": "interest_rate", "납입 횟수": "periods"}
+    solve_for = st.radio("역산 대상", list(goal_seek_targets), horizontal=True)
 
     if st.button("계산 실행"):
-        req_investment, sim_final, iterations = find_required_investment(target_value)
-        st.success(f"목표 {target_value:,.0f}원을 달성하기 위해서는 매 기간 약 {req_investment:,.0f}원의 투자 필요 (최종 시뮬레이션: {sim_final:,.0f}원, {iterations}회 반복)")
+        from krw import goal_seek
+
+        with metrics.span("goal_seek"):
+            solved = goal_seek.solve_for_target(prepared_base, target_value, goal_seek_targets[solve_for])
+        if solved["value"] is None:
+            message = None
+        elif solve_for == "매 기간 납입 금액":
+            message = f"매 기간 약 {solved['value']:,.0f}원의 투자 필요"
+        elif solve_for == "약정 이자율":
+            message = f"유지 종료 시점 약정 이자율 약 {solved['value']:.2f}% 필요"
+        else:
+            message = f"{interval_option} 간격으로 {solved['value']:,}회 (약 {solved['purchase_years']:.2f}년) 납입 필요"
+
+        if message is None:
+            st.warning(f"현재 설정으로는 목표 {target_value:,.0f}원을 달성할 수 없습니다. (계산 시간: {solved['elapsed_ms']:.1f}ms)")
+        else:
+            st.success(f"목표 {target_value:,.0f}원을 달성하기 위해서는 {message} (최종 시뮬레이션: {solved['final_holding_value']:,.0f}원, 계산 시간: {solved['elapsed_ms']:.1f}ms)")
     st.markdown("<div class='small-text'>※ 단, 과거 데이터를 기반으로 한 단순 역산이므로 참고용으로만 활용해주세요.</div>", unsafe_allow_html=True)
 
+with tabs[3]:
+    st.subheader("포트폴리오 정액 투자")
+    st.markdown("여러 자산에 매 기간 납입 금액을 비중대로 나눠 투자합니다. 사이드바의 기간·간격·이자율 설정을 그대로 사용합니다.")
+    portfolio_text = st.text_area("티커:비중 (쉼표로 구분)", value="AAPL:0.4, MSFT:0.3, SPY:0.3")
+    portfolio_fx = st.checkbox("해외 자산 달러 전환 적용", value=False)
+
+    if st.button("포트폴리오 시뮬레이션"):
+        from krw import portfolio
+
+        try:
+            portfolio_weights = portfolio.parse_weights(portfolio_text)
+        except ValueError as e:
+            st.error(str(e))
+            portfolio_weights = None
+        if portfolio_weights:
+            sim_portfolio = prepare_portfolio(portfolio_weights, investment_per_period, portfolio_fx)
+            if sim_portfolio is not None:
+                col_p1, col_p2, col_p3 = st.columns(3)
+                with col_p1:
+                    st.metric("총 납입 원화", f"{sim_portfolio['total_investment']:,.0f}원")
+                with col_p2:
+                    st.metric("만기 자산 가치", f"{sim_portfolio['final_holding_value']:,.0f}원")
+                with col_p3:
+                    st.metric("예상 수익률", f"{sim_portfolio['profit_rate']:.2f}%")
+                st.dataframe(portfolio.summary_frame(sim_portfolio["tickers"], sim_portfolio), use_container_width=True)
+                st.markdown(f"<div class='small-text'>* 실제 사용된 데이터 시작일: {sim_portfolio['start_date'].strftime('%Y년 %m월 %d일')}</div>", unsafe_allow_html=True)
+
+with tabs[4]:
+    st.subheader("파라미터 비교")
+    st.markdown("납입 간격 · 납입 기간 · 유지 기간 · 이자율 범위의 모든 조합을 한 번에 계산해 비교합니다.")
+    sweep_intervals = st.multiselect("납입 간격", list(interval_freq_map), default=[interval_option])
+    sweep_step = 0.5 if total_period_years >= 1 else total_period_years
+    sweep_purchase = st.slider("납입 기간 범위 (년)", 0.0, float(total_period_years), (0.0, float(total_period_years)), step=sweep_step)
+    sweep_holding = st.slider("유지 기간 범위 (년)", 0.0, float(total_period_years), (0.0, float(total_period_years)), step=sweep_step)
+    sweep_interest = st.slider("약정 이자율 범위 (%)", -10.0, 20.0, (0.0, 5.0), step=0.5)
+    sweep_compound = st.slider("복리 이자율 범위 (%)", -10.0, 20.0, (0.0, 5.0), step=0.5)
+
+    if st.button("비교 실행"):
+        from krw import sweep
+
+        sweep_started = time.perf_counter()
+        axes = (
+            year_steps(sweep_purchase, sweep_step) if sweep_step > 0 else np.array([0.0]),
+            year_steps(sweep_holding, sweep_step) if sweep_step > 0 else np.array([0.0]),
+            year_steps(sweep_interest, 0.5),
+            year_steps(sweep_compound, 0.5),
+        )
+        frames = []
+        for interval in sweep_intervals:
+            grid, grid_prices, base_price = sweep.interval_prices(prepared_base, interval_freq_map[interval])
+            result = sweep.sweep_interval(grid_prices, grid, prepared_base["start_date"], total_period_years, *axes, investment_per_period, base_price)
+            frames.append(sweep.sweep_frame(interval, *axes, result))
+        st.session_state["sweep_result"] = pd.concat(frames, ignore_index=True) if frames else None
+        st.session_state["sweep_elapsed_ms"] = (time.perf_counter() - sweep_started) * 1000
+
+    sweep_result = st.session_state.get("sweep_result")
+    if sweep_result is not None and not sweep_result.empty and tab_is_open(tabs[4]):
+        st.markdown(f"<div class='small-text'>{len(sweep_result):,}개 조합 계산 ({st.session_state['sweep_elapsed_ms']:.0f}ms)</div>", unsafe_allow_html=True)
+        col_s1, col_s2, col_s3, col_s4 = st.columns(4)
+        with col_s1:
+            heat_interval = st.selectbox("히트맵 납입 간격", sorted(sweep_result["interval_option"].unique(), key=list(interval_freq_map).index))
+        with col_s2:
+            heat_interest = st.selectbox("히트맵 약정 이자율 (%)", sorted(sweep_result["interest_rate_percent"].unique()))
+        with col_s3:
+            heat_compound = st.selectbox("히트맵 복리 이자율 (%)", sorted(sweep_result["compound_interest_rate_percent"].unique()))
+        with col_s4:
+            heat_metric = st.selectbox("지표", ["profit_rate", "final_holding_value"], format_func={"profit_rate": "예상 수익률 (%)", "final_holding_value": "만기 자산 가치 (원)"}.get)
+        heat = sweep_result[
+            (sweep_result["interval_option"] == heat_interval)
+            & (sweep_result["interest_rate_percent"] == heat_interest)
+            & (sweep_result["compound_interest_rate_percent"] == heat_compound)
+        ].pivot(index="holding_period_years", columns="purchase_period_years", values=heat_metric)
+        import plotly.graph_objects as go
+
+        heat_fig = go.Figure(go.Heatmap(z=heat.values, x=heat.columns, y=heat.index, colorscale="Blues", colorbar=dict(title=heat_metric)))
+        heat_fig.update_layout(xaxis_title="납입 기간 (년)", yaxis_title="유지 기간 (년)", height=450, plot_bgcolor='white')
+        st.plotly_chart(heat_fig, use_container_width=True)
+        st.markdown("<div class='small-text'>* 선택한 지표 기준 상위 500개 조합 (전체 결과는 CSV 로 다운로드)</div>", unsafe_allow_html=True)
+        st.dataframe(sweep_result.nlargest(500, heat_metric), use_container_width=True)
+        st.download_button("전체 결과 다운로드", data=sweep_result.to_csv(index=False), file_name="sweep_result.csv", mime="text/csv")
+
+with tabs[5]:
+    st.subheader("롤링 시작일 백테스트")
+    st.markdown("현재 설정(납입 간격 · 납입 기간 · 전체 운용 기간 · 이자율)을 과거의 모든 시작일에 대해 실행해 성과 분포를 보여줍니다.")
+    rolling_start = st.date_input("이력 조회 시작일", value=datetime(1990, 1, 1).date())
+
+    if st.button("백테스트 실행"):
+        from krw import rolling
+
+        rolling_started = time.perf_counter()
+        grid, grid_prices = rolling_inputs(rolling_start.strftime("%Y-%m-%d"))
+        if grid is None:
+            st.error("가격 데이터를 불러올 수 없습니다.")
+        else:
+            backtest = rolling.rolling_backtest(
+                grid, grid_prices,
+                int(round(purchase_period_years * 12)), int(round(total_period_years * 12)),
+                investment_per_period, interest_rate_percent, compound_interest_rate_percent, conversion_period_years
+            )
+            summary = rolling.summarize(backtest)
+            rolling_elapsed_ms = (time.perf_counter() - rolling_started) * 1000
+            if summary is None:
+                st.warning("전체 운용 기간을 채울 수 있는 시작일이 없습니다. 이력 조회 시작일이나 운용 기간을 조정해주세요.")
+            else:
+                col_r1, col_r2, col_r3, col_r4 = st.columns(4)
+                with col_r1:
+                    st.metric("중앙값 수익률", f"{summary['percentiles'][50]:.2f}%")
+                with col_r2:
+                    st.metric("손실 확률", f"{summary['loss_probability'] * 100:.1f}%")
+                with col_r3:
+                    st.metric("최악 수익률", f"{summary['worst']:.2f}%", help=f"시작일 {summary['worst_start'].strftime('%Y-%m-%d')}")
+                with col_r4:
+                    st.metric("최고 수익률", f"{summary['best']:.2f}%", help=f"시작일 {summary['best_start'].strftime('%Y-%m-%d')}")
+                import plotly.graph_objects as go
+
+                rolling_fig = go.Figure(go.Scatter(x=backtest["start_dates"], y=backtest["profit_rate"], mode='lines', name='수익률', line=dict(width=1, color='#003b70')))
+                rolling_fig.add_hline(y=0, line=dict(color='#dc3545', width=1, dash='dash'))
+                rolling_fig.update_layout(xaxis_title='시작일', yaxis_title='수익률 (%)', height=400, plot_bgcolor='white')
+                st.plotly_chart(rolling_fig, use_container_width=True)
+                st.dataframe(pd.DataFrame({"백분위": [f"{p}%" for p in summary["percentiles"]], "수익률 (%)": list(summary["percentiles"].values())}), use_container_width=True, hide_index=True)
+                st.markdown(f"<div class='small-text'>시작일 {summary['count']:,}개 계산 ({rolling_elapsed_ms:.0f}ms)</div>", unsafe_allow_html=True)
+
 with st.expander("❓ 자주 묻는 질문"):
     st.markdown(f"""
     **Q: 정액 투자 방식의 장점은 무엇인가요?**  
@@ -589,7 +869,38 @@ with st.expander("❓ 자주 묻는 질문"):
     A: 원하는 만기 자산 가치를 입력하면, 해당 목표 달성을 위해 필요한 매 기간 투자액을 산출합니다.
     
     **Q: 2003년 12월 이전 데이터는 사용할 수 없나요?**  
-    A: 현재 시뮬레이터는 Yahoo Finance 데이터를 사용하며, 2003년 12월부터의 데이터만 제공됩니다.
+    A: 달러(USDKRW=X)는 함께 제공되는 원/달러 환율 이력(krw.csv)으로 1990년 3월부터 시뮬레이션할 수 있으며, 이후 구간은 Yahoo Finance 데이터로 이어 붙입니다. 그 외 자산은 Yahoo Finance 제공 시점부터 사용할 수 있습니다.
     """)
 
-st.markdown("<div class='footer'>© 2025 정액 투자 시뮬레이터 | 데이터 출처: Yahoo Finance (2003년 12월부터 제공, 1시간마다 자동 업데이트)<br>이 시뮬레이터는 참고용으로만 사용하시기 바랍니다.</div>", unsafe_allow_html=True)
+# ========================#
+# 8. 계측 내보내기 및 디버그 패널 #
+# ========================#
+rerun_elapsed_ms = (time.perf_counter() - rerun_started) * 1000
+app_runs = get_app_runs()
+cold_start = app_runs["count"] == 0
+metrics.REGISTRY.observe("cold_start" if cold_start else "rerun", rerun_elapsed_ms)
+app_runs["count"] += 1
+metrics_file = os.environ.get("KRW_METRICS_FILE")
+if metrics_file:
+    # .prom 이면 Prometheus 텍스트, 그 외는 JSON 으로 재실행마다 갱신
+    metrics.REGISTRY.write(metrics_file)
+
+if show_debug_panel:
+    with st.expander("🛠 디버그 패널", expanded=True):
+        st.markdown(f"<div class='small-text'>이번 재실행{' (콜드 스타트)' if cold_start else ''}: {rerun_elapsed_ms:.1f}ms</div>", unsafe_allow_html=True)
+        st.dataframe(pd.DataFrame({
+            "구간": ["　" * entry["depth"] + entry["span"] for entry in rerun_trace],
+            "소요 시간 (ms)": [entry["elapsed_ms"] for entry in rerun_trace],
+        }), use_container_width=True, hide_index=True)
+        metrics_snapshot = metrics.REGISTRY.snapshot()
+        st.markdown("**구간별 누적 지연 시간 (프로세스 전체)**")
+        st.dataframe(pd.DataFrame.from_dict(metrics_snapshot["spans"], orient="index"), use_container_width=True)
+        st.markdown("**가격 캐시 적중 / 누락**")
+        st.dataframe(pd.DataFrame([{**c["labels"], "횟수": c["value"]} for c in metrics_snapshot["counters"]]), use_container_width=True, hide_index=True)
+        col_m1, col_m2 = st.columns(2)
+        with col_m1:
+            st.download_button("계측 결과 JSON", data=metrics.REGISTRY.to_json(), file_name="krw_metrics.json", mime="application/json")
+        with col_m2:
+            st.download_button("Prometheus 텍스트", data=metrics.REGISTRY.to_prometheus(), file_name="krw_metrics.prom", mime="text/plain")
+
+st.markdown("<div class='footer'>© 2025 정액 투자 시뮬레이터 | 데이터 출처: Yahoo Finance (1시간마다 자동 업데이트), 원/달러 환율 이력 krw.csv (1990년 3월부터)<br>이 시뮬레이터는 참고용으로만 사용하시기 바랍니다.</div>", unsafe_allow_html=True)
@@ -0,0 +1,74 @@
+import importlib
+
+# ===================================#
+# 공개 이름 (처음 쓰일 때 불러오기)        #
+# ===================================#
+# 'from krw import config' 처럼 하위 모듈 하나만 쓰는 쪽(Streamlit 앱 재실행 등)이
+# 배치 · 프로세스 풀 · 몬테카를로 같은 다른 모듈까지 불러오지 않도록, 아래 이름은 처음 접근할 때 해당 모듈에서 가져옵니다.
+
+_EXPORTS = {
+    "krw.alignment": ("AlignmentCache", "date_grid"),
+    "krw.batch": ("run_batch",),
+    "krw.cache": ("PriceCache", "RangeCache", "SingleFlight"),
+    "krw.config": ("DEFAULT_CONFIG", "normalize_config", "simulation_window"),
+    "krw.data": ("PriceSource",),
+    "krw.downsample": ("lttb_indices", "minmax_indices"),
+    "krw.engine": (
+        "accumulate_purchases",
+        "apply_rate_scenarios",
+        "cumulative_reciprocal",
+        "rate_fan",
+        "rate_multiplier",
+        "simulate_dca",
+    ),
+    "krw.fetch": ("call_with_timeout", "retry_call", "run_parallel"),
+    "krw.fx": ("KrwCloseCache", "joint_close", "krw_close"),
+    "krw.goal_seek": (
+        "SOLVE_TARGETS",
+        "solve_for_target",
+        "solve_required_interest_rate",
+        "solve_required_investment",
+        "solve_required_periods",
+    ),
+    "krw.history": ("PriceHistory", "load_krw_history", "merged_price_range"),
+    "krw.metrics": ("REGISTRY", "Metrics"),
+    "krw.montecarlo": ("run_projection",),
+    "krw.pipeline": ("Pipeline", "run_stages", "stage_keys"),
+    "krw.portfolio": ("align_close_matrix", "parse_weights", "simulate_portfolio"),
+    "krw.prefix": ("INDEX_START", "IndexStore", "ReciprocalIndex", "build_index"),
+    "krw.refresh": ("RefreshService", "RefreshStatus"),
+    "krw.rolling": ("rolling_backtest", "summarize"),
+    "krw.shared": ("SharedPrices",),
+    "krw.simulation": (
+        "accumulate",
+        "align_prices",
+        "indexed_prepare",
+        "indexed_simulate",
+        "load_and_simulate",
+        "simulate",
+    ),
+    "krw.store": (
+        "CsvProvider",
+        "FrameProvider",
+        "PriceStore",
+        "ResilientProvider",
+        "StandInProvider",
+        "YFinanceProvider",
+    ),
+    "krw.sweep": ("interval_prices", "sweep_frame", "sweep_interval"),
+}
+_MODULES = {name: module for module, names in _EXPORTS.items() for name in names}
+__all__ = sorted(_MODULES)
+
+
+def __getattr__(name):
+    module = _MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_MODULES))
@@ -0,0 +1,5 @@
+import sys
+
+from krw.cli import main
+
+sys.exit(main())
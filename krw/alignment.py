@@ -0,0 +1,131 @@
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# ===================================#
+# 날짜 격자 · 정렬 위치 메모이제이션       #
+# ===================================#
+# 같은 (티커, 납입 간격, 구간) 이면 날짜 격자와 reindex(method='ffill') 결과 위치가 매번 같으므로
+# 격자는 한 번만 만들고, 격자 → 가격 배열 위치(searchsorted)도 한 번만 계산해 둡니다.
+# 이후 정렬은 정수 위치로 값을 모으는(gather) 것으로 끝납니다.
+
+
+DAY_NS = 86_400_000_000_000
+
+
+def _first_on_offset(day, freq):
+    # 시작일을 납입 간격의 기준일(주: 일요일, 월: 1일, 연: 1월 1일)로 올림
+    if freq == "W":
+        return day + pd.Timedelta(days=(6 - day.weekday()) % 7)
+    if freq == "MS" and day.day != 1:
+        return day + pd.offsets.MonthBegin(1)
+    if freq == "AS" and (day.month, day.day) != (1, 1):
+        return day + pd.offsets.YearBegin(1)
+    return day
+
+
+def _last_on_offset(day, freq):
+    # 종료일을 납입 간격의 기준일로 내림
+    if freq == "W":
+        return day - pd.Timedelta(days=(day.weekday() + 1) % 7)
+    if freq == "MS":
+        return day.replace(day=1)
+    if freq == "AS":
+        return day.replace(month=1, day=1)
+    return day
+
+
+def _wall_clock_grid(start, end, freq):
+    # pd.date_range 와 같은 규칙을 정수 연산으로 계산합니다.
+    # 벽시계 시각은 시작 시각을 유지하고, 시작일이 기준일이 아니면 기준일로 올립니다.
+    # 시작일이 이미 기준일이면 대신 종료일을 기준일로 내립니다(종료 시각은 유지).
+    time_of_day = start.value - start.normalize().value
+    first = _first_on_offset(start.normalize(), freq)
+    if first == start.normalize():
+        end = _last_on_offset(end.normalize(), freq) + (end - end.normalize())
+    if freq in ("D", "W"):
+        step = DAY_NS * (7 if freq == "W" else 1)
+        # np.arange 는 개수를 실수 나눗셈으로 구해 끝점을 놓칠 수 있으므로 개수를 정수로 계산
+        first_value = first.value + time_of_day
+        count = max((end.value - first_value) // step + 1, 0)
+        values = first_value + step * np.arange(count, dtype=np.int64)
+    else:
+        unit = "M" if freq == "MS" else "Y"
+        periods = np.arange(np.datetime64(first, unit), np.datetime64(end, unit) + 1)
+        values = periods.astype("datetime64[ns]").astype(np.int64) + time_of_day
+        values = values[values <= end.value]
+    return values
+
+
+@lru_cache(maxsize=256)
+def date_grid(start, end, freq, tz=None, inclusive="both"):
+    # pd.date_range(start, end, freq, tz, inclusive) 와 같은 격자. 간격 D / W / MS / AS 는 직접 계산합니다.
+    if freq not in ("D", "W", "MS", "AS") or inclusive not in ("both", "left"):
+        return pd.date_range(start=start, end=end, freq=freq, tz=tz, inclusive=inclusive)
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    if tz is not None:
+        start = start.tz_convert(tz) if start.tzinfo is not None else start
+        end = end.tz_convert(tz) if end.tzinfo is not None else end
+    values = _wall_clock_grid(start.tz_localize(None), end.tz_localize(None), freq)
+    # pandas 는 start == end 이면 inclusive="left" 여도 끝점을 남깁니다.
+    if inclusive == "left" and start != end and len(values) and values[-1] == end.tz_localize(None).value:
+        values = values[:-1]
+    grid = pd.DatetimeIndex(values.astype("datetime64[ns]"))
+    return grid.tz_localize(tz) if tz is not None else grid
+
+
+def ffill_positions(index, grid):
+    # reindex(grid, method='ffill') 와 같은 위치: 격자 날짜 이하의 마지막 행, 없으면 -1
+    positions = np.searchsorted(pd.DatetimeIndex(index).asi8, pd.DatetimeIndex(grid).asi8, side="right") - 1
+    positions.setflags(write=False)
+    return positions
+
+
+def gather(values, positions):
+    # 위치 -1 (데이터 시작 이전) 은 NaN
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return np.full(len(positions), np.nan)
+    gathered = values[np.maximum(positions, 0)]
+    return np.where(positions >= 0, gathered, np.nan)
+
+
+class AlignmentCache:
+    # (티커, 격자 키, 가격 인덱스 길이 · 첫 날짜 · 마지막 날짜) → ffill 위치
+    # 가격 데이터가 갱신되어 인덱스가 바뀌면 키가 달라지므로 오래된 위치를 쓰지 않습니다.
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def positions(self, ticker, index, grid, grid_key):
+        index = pd.DatetimeIndex(index)
+        fingerprint = (len(index), index.asi8[0], index.asi8[-1]) if len(index) else (0,)
+        key = (ticker, grid_key, fingerprint)
+        with self._lock:
+            positions = self._entries.get(key)
+            if positions is not None:
+                self._entries.move_to_end(key)
+                return positions
+        positions = ffill_positions(index, grid)
+        with self._lock:
+            self._entries[key] = positions
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return positions
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# 프로세스 전체가 공유하는 기본 캐시
+ALIGNMENT_CACHE = AlignmentCache()
+
+
+def align_close(ticker, frame, grid, grid_key, cache=ALIGNMENT_CACHE):
+    # frame['Close'] 를 grid 에 ffill 로 맞춘 배열
+    return gather(frame["Close"].to_numpy(), cache.positions(ticker, frame.index, grid, grid_key))
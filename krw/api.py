@@ -0,0 +1,236 @@
+import argparse
+import json
+import logging
+import math
+import os
+import time
+from contextlib import AsyncExitStack
+
+import anyio
+import numpy as np
+import pandas as pd
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+from starlette.routing import Route
+
+from krw import goal_seek, metrics, pipeline, sweep
+from krw.config import INTERVAL_FREQ_MAP
+from krw.data import PriceSource
+from krw.simulation import load_and_simulate
+
+# ===================================#
+# HTTP / JSON API                     #
+# ===================================#
+# Streamlit 화면 없이 시뮬레이션 · 목표 역산 · 파라미터 비교를 호출하는 ASGI 앱입니다.
+# 요청마다 설정 전체를 받아 계산하므로(상태 없음) 워커를 몇 개 띄워도 결과가 같고,
+# 한 프로세스의 요청들은 PriceSource(가격 캐시 · 1/가격 색인)와 단계 캐시(Pipeline)를 함께 씁니다.
+# 여러 워커 프로세스는 같은 가격 저장소 디렉터리(KRW_PRICE_STORE)의 SQLite · index/*.npy · shared/*.npy 를 공유합니다.
+#
+# 계산은 스레드에서 실행하고 동시에 계산하는 요청 수를 workers 개로 제한합니다.
+# 파라미터 비교는 그중 sweep_workers 개까지만 쓰므로 큰 비교 요청이 다른 요청을 막지 않고,
+# 자리가 queue_timeout 초 안에 나지 않으면 503 으로 바로 돌려보냅니다.
+#
+#   uvicorn --factory krw.api:create_app --port 8000
+#   python -m krw.api --port 8000 --workers 4 --publish USDKRW=X SPY
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 64 * 1024
+MAX_SWEEP_CELLS = 200_000
+DEFAULT_QUEUE_TIMEOUT = 5.0
+
+
+class ApiError(Exception):
+    def __init__(self, status_code, message):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _plain(value):
+    # JSON 으로 내보낼 수 있는 값 (NaN · inf 는 null)
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _config(body, default):
+    config = body.get("config", default)
+    if not isinstance(config, dict):
+        raise ValueError("config 는 JSON 객체여야 합니다.")
+    return config
+
+
+def _intervals(body):
+    intervals = body.get("intervals")
+    if intervals is not None and not isinstance(intervals, list):
+        raise ValueError("intervals 는 납입 간격 목록이어야 합니다.")
+    return intervals
+
+
+def _axis(body, name, default):
+    values = body.get(name, default)
+    if not isinstance(values, list) or not values or not all(isinstance(v, (int, float)) for v in values):
+        raise ValueError(f"{name} 는 숫자 목록이어야 합니다.")
+    return np.asarray(values, dtype=np.float64)
+
+
+class SimulatorApi:
+    def __init__(self, source=None, workers=None, sweep_workers=None, queue_timeout=DEFAULT_QUEUE_TIMEOUT,
+                 max_body_bytes=MAX_BODY_BYTES, max_sweep_cells=MAX_SWEEP_CELLS):
+        workers = workers or max(2, os.cpu_count() or 1)
+        self.source = source or PriceSource()
+        self.pipeline = pipeline.Pipeline(maxsize=256)
+        self.slots = anyio.Semaphore(workers)
+        self.sweep_slots = anyio.Semaphore(sweep_workers or max(1, workers // 4))
+        self.queue_timeout = queue_timeout
+        self.max_body_bytes = max_body_bytes
+        self.max_sweep_cells = max_sweep_cells
+
+    async def _body(self, request):
+        body = await request.body()
+        if len(body) > self.max_body_bytes:
+            raise ApiError(413, f"요청 본문은 {self.max_body_bytes:,} 바이트를 넘을 수 없습니다.")
+        try:
+            body = json.loads(body)
+        except ValueError:
+            raise ApiError(400, "요청 본문이 올바른 JSON 이 아닙니다.")
+        if not isinstance(body, dict):
+            raise ApiError(400, "요청 본문은 JSON 객체여야 합니다.")
+        return body
+
+    async def _bounded(self, fn, *semaphores):
+        # 계산 자리를 잡은 뒤 스레드에서 실행. 자리를 기다리는 시간만 queue_timeout 으로 제한합니다.
+        async with AsyncExitStack() as stack:
+            try:
+                with anyio.fail_after(self.queue_timeout):
+                    for semaphore in semaphores:
+                        await stack.enter_async_context(semaphore)
+            except TimeoutError:
+                metrics.incr("api_rejected_total", reason="busy")
+                raise ApiError(503, "요청이 많아 지금은 계산할 수 없습니다. 잠시 후 다시 시도해주세요.")
+            return await anyio.to_thread.run_sync(fn)
+
+    def _prepared(self, config):
+        return pipeline.run_stages(self.pipeline, config, self.source.inputs)["prepared"]
+
+    def simulate(self, body):
+        return load_and_simulate(_config(body, body), self.source)
+
+    def goal_seek(self, body):
+        solve_for = body.get("solve_for", "investment")
+        if solve_for not in goal_seek.SOLVE_TARGETS:
+            raise ValueError(f"solve_for 는 {', '.join(goal_seek.SOLVE_TARGETS)} 중 하나여야 합니다.")
+        target = body.get("target")
+        if not isinstance(target, (int, float)):
+            raise ValueError("target(목표 만기 자산 가치)은 숫자여야 합니다.")
+        solved = goal_seek.solve_for_target(self._prepared(_config(body, {})), target, solve_for)
+        return {"solve_for": solve_for, "target": target, **solved}
+
+    def sweep(self, body):
+        config = _config(body, {})
+        intervals = _intervals(body) or [config.get("interval_option", "1개월")]
+        unknown = [interval for interval in intervals if interval not in INTERVAL_FREQ_MAP]
+        if unknown:
+            raise ValueError(f"알 수 없는 납입 간격입니다: {', '.join(map(str, unknown))}")
+        prepared = self._prepared(config)
+        config = prepared["config"]
+        axes = (
+            _axis(body, "purchase_years", [config["purchase_period_years"]]),
+            _axis(body, "holding_years", [config["holding_period_years"]]),
+            _axis(body, "interest_rates", [config["interest_rate_percent"]]),
+            _axis(body, "compound_rates", [config["compound_interest_rate_percent"]]),
+        )
+        started = time.perf_counter()
+        frames = []
+        for interval in intervals:
+            grid, grid_prices, base_price = sweep.interval_prices(prepared, INTERVAL_FREQ_MAP[interval])
+            result = sweep.sweep_interval(grid_prices, grid, prepared["start_date"], config["total_period_years"],
+                                          *axes, config["investment_per_period"], base_price)
+            frames.append(sweep.sweep_frame(interval, *axes, result))
+        rows = pd.concat(frames, ignore_index=True)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        # 행이 많으므로 pandas 로 직접 직렬화 (NaN 은 null)
+        return f'{{"count": {len(rows)}, "elapsed_ms": {elapsed_ms:.3f}, "rows": {rows.to_json(orient="records", force_ascii=False)}}}'
+
+    def sweep_cells(self, body):
+        # 계산 전에 조합 수(납입 간격 × 네 축 길이)로 요청 크기를 제한
+        cells = len(_intervals(body) or [None])
+        for name in ("purchase_years", "holding_years", "interest_rates", "compound_rates"):
+            values = body.get(name)
+            cells *= len(values) if isinstance(values, list) and values else 1
+        return cells
+
+    def endpoint(self, name, heavy=False):
+        async def handle(request):
+            with metrics.span(f"api_{name}"):
+                try:
+                    body = await self._body(request)
+                    if heavy and self.sweep_cells(body) > self.max_sweep_cells:
+                        metrics.incr("api_rejected_total", reason="too_large")
+                        raise ApiError(413, f"조합 수는 {self.max_sweep_cells:,}개를 넘을 수 없습니다.")
+                    semaphores = (self.sweep_slots, self.slots) if heavy else (self.slots,)
+                    result = await self._bounded(lambda: getattr(self, name)(body), *semaphores)
+                except ApiError as e:
+                    return JSONResponse({"error": str(e)}, status_code=e.status_code)
+                except ValueError as e:
+                    return JSONResponse({"error": str(e)}, status_code=422)
+                except Exception as e:
+                    logger.exception("%s 요청을 처리하지 못했습니다.", name)
+                    return JSONResponse({"error": str(e)}, status_code=500)
+            metrics.incr("api_requests_total", endpoint=name)
+            if isinstance(result, str):
+                return Response(result, media_type="application/json")
+            return JSONResponse(_plain(result))
+        return handle
+
+    async def prometheus(self, request):
+        return PlainTextResponse(metrics.REGISTRY.to_prometheus())
+
+    async def health(self, request):
+        return JSONResponse({"status": "ok"})
+
+
+def create_app(source=None, **limits):
+    api = SimulatorApi(source, **limits)
+    routes = [
+        Route("/simulate", api.endpoint("simulate"), methods=["POST"]),
+        Route("/goal-seek", api.endpoint("goal_seek"), methods=["POST"]),
+        Route("/sweep", api.endpoint("sweep", heavy=True), methods=["POST"]),
+        Route("/metrics", api.prometheus),
+        Route("/healthz", api.health),
+    ]
+    app = Starlette(routes=routes)
+    app.state.api = api
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="krw.api", description="정액 투자 시뮬레이터 HTTP API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="워커 프로세스 수 (가격 저장소 디렉터리를 공유)")
+    parser.add_argument("--offline", action="store_true", help="네트워크 없이 번들 krw.csv 만 사용")
+    parser.add_argument("--publish", nargs="*", default=[], metavar="TICKER",
+                        help="워커를 띄우기 전에 전체 이력을 공유 가격 배열로 게시할 티커")
+    args = parser.parse_args(argv)
+    if args.offline:
+        os.environ["KRW_PRICE_PROVIDER"] = "offline"
+    if args.publish:
+        # 워커들은 게시된 배열을 메모리 맵으로 열기만 하므로 첫 요청에서 이력을 다시 받지 않습니다.
+        source = PriceSource()
+        for ticker in args.publish:
+            source.publish(ticker)
+
+    import uvicorn
+
+    uvicorn.run("krw.api:create_app", factory=True, host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
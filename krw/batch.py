@@ -0,0 +1,273 @@
+import json
+import logging
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import islice
+
+import pandas as pd
+
+from krw.cache import PriceCache, slice_range
+from krw.config import INTERVAL_FREQ_MAP, normalize_config, simulation_window
+from krw.fetch import run_parallel
+from krw.fx import fx_start
+from krw.history import KRW_TICKER
+from krw.prefix import IndexStore
+from krw.shared import SharedPrices
+from krw.simulation import indexed_simulate, simulate
+from krw.store import _day
+
+# ===================================#
+# JSONL 일괄 실행                      #
+# ===================================#
+# 설정 파일을 chunk_size 줄씩만 읽어 티커별로 묶고, 티커마다 필요한 구간의 합집합을
+# 한 번만 불러온 뒤 (티커 가격, 설정 묶음) 단위로 프로세스 풀에 나눠 계산합니다.
+# 메모리에는 한 청크의 설정과 결과, 그리고 PriceSource 캐시(바이트 한도)만 남습니다.
+# 프로세스 풀을 쓰면 작업에는 가격 · 색인 대신 공유 가격 배열(shared/) · 색인(index/) 참조만 담고,
+# 워커가 시작할 때 한 번 연 메모리 맵에서 잘라 씁니다. 공유 배열이 덮지 않는 구간만 가격을 그대로 보냅니다.
+
+# Parquet 출력 열 (오류 줄은 결과 열이 비어 있습니다)
+PARQUET_COLUMNS = [
+    ("index", "int64"),
+    ("error", "string"),
+    ("asset_ticker", "string"),
+    ("total_investment_purchase", "float64"),
+    ("final_holding_value", "float64"),
+    ("profit_rate", "float64"),
+    ("final_effective_price_purchase", "float64"),
+    ("total_units_purchase", "float64"),
+    ("base_price", "float64"),
+    ("current_effective_price", "float64"),
+    ("optimistic_final_holding_value", "float64"),
+    ("optimistic_profit_rate", "float64"),
+    ("pessimistic_final_holding_value", "float64"),
+    ("pessimistic_profit_rate", "float64"),
+    ("purchase_count", "int64"),
+    ("start_date", "string"),
+    ("purchase_end_date", "string"),
+    ("holding_end_date", "string"),
+    ("end_date", "string"),
+    ("warnings", "string"),
+]
+
+logger = logging.getLogger(__name__)
+
+
+def iter_configs(stream):
+    # 한 줄에 설정 하나. 빈 줄은 건너뛰고, 읽는 즉시 (줄 번호, 설정) 으로 내보냅니다.
+    index = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield index, json.loads(line)
+        except ValueError as e:
+            yield index, e
+        index += 1
+
+
+# 프로세스 풀 워커마다 한 번 여는 공유 가격 배열 · 색인 저장소
+_worker = {}
+
+
+def _init_worker(shared_root, index_root):
+    _worker["shared"] = SharedPrices(shared_root)
+    _worker["indexes"] = IndexStore(index_root)
+
+
+def _open_frame(ref):
+    # (티커, 시작, 확정 구간 끝, 오늘 이후 꼬리) 참조면 공유 가격 배열에서 열고, 가격이면 그대로
+    if not isinstance(ref, tuple):
+        return ref
+    ticker, start, closed_end, tail = ref
+    closed = _worker["shared"].get(ticker, start, closed_end)
+    if closed is None:
+        raise ValueError(f"{ticker} 공유 가격 배열을 열 수 없습니다.")
+    return PriceCache._combine([closed, tail])
+
+
+def _open_index(ref):
+    # (색인 키, 간격, 지문) 참조면 저장된 색인을 열고(없으면 None), 색인이면 그대로
+    if not isinstance(ref, tuple):
+        return ref
+    return _worker["indexes"].open(*ref)
+
+
+def _run_group(task):
+    # 같은 티커 가격을 공유하는 설정 묶음을 계산 (프로세스 풀 작업 단위)
+    # 1/가격 누적합 색인으로 답할 수 있는 설정은 O(1), 나머지는 전체 경로로 계산합니다.
+    frames, latest, indexes, items = task
+    try:
+        frames = {ticker: _open_frame(ref) for ticker, ref in frames.items()}
+    except Exception as e:
+        return [{"index": index, "error": str(e)} for index, _ in items]
+    indexes = {key: _open_index(ref) for key, ref in indexes.items()}
+    lines = []
+    for index, config in items:
+        try:
+            _, _, start_str, end_str = simulation_window(config)
+            ticker = config["asset_ticker"]
+            prices = slice_range(frames[ticker], start_str, end_str)
+            usdkrw_prices = latest_exchange_rate = None
+            if config["overseas_investment"]:
+                usdkrw_prices = slice_range(frames[KRW_TICKER], fx_start(start_str), end_str)
+                latest_exchange_rate = latest[KRW_TICKER]
+            args = (prices, usdkrw_prices, latest[ticker], latest_exchange_rate)
+            price_index = indexes.get((INTERVAL_FREQ_MAP[config["interval_option"]], config["overseas_investment"]))
+            result = indexed_simulate(config, price_index, *args) if price_index is not None else None
+            lines.append({"index": index, "result": result or simulate(config, *args)})
+        except Exception as e:
+            lines.append({"index": index, "error": str(e)})
+    return lines
+
+
+def _shared_ref(source, ticker, start, end):
+    # 워커가 공유 가격 배열에서 [start, end) 를 직접 열 수 있으면 참조, 아니면 None
+    # 오늘 이후 꼬리(실시간 봉)는 게시 대상이 아니므로 작은 가격 그대로 담습니다.
+    closed_end = min(_day(end), pd.Timestamp.today().normalize())
+    if _day(start) >= closed_end or not source.shared.covers(ticker, start, closed_end):
+        return None
+    tail = source.history(ticker, closed_end, end) if _day(end) > closed_end else None
+    return ticker, start, closed_end, tail
+
+
+def plan_chunk(items, source, task_size=256, shared=False):
+    # 청크 안의 설정을 티커별로 묶고, 티커마다 [가장 이른 시작, 가장 늦은 끝) 구간을 한 번만 불러옵니다.
+    # shared 이면 작업에 가격 · 색인 대신 워커가 열 참조를 담습니다(프로세스 풀용).
+    errors, groups, windows = [], {}, {}
+    for index, config in items:
+        try:
+            if isinstance(config, Exception):
+                raise config
+            config = normalize_config(config)
+        except Exception as e:
+            errors.append({"index": index, "error": str(e)})
+            continue
+        _, _, start_str, end_str = simulation_window(config)
+        needed = [(config["asset_ticker"], start_str)] + ([(KRW_TICKER, fx_start(start_str))] if config["overseas_investment"] else [])
+        for ticker, first in needed:
+            lo, hi = windows.get(ticker, (first, end_str))
+            windows[ticker] = (min(lo, first), max(hi, end_str))
+        groups.setdefault(config["asset_ticker"], []).append((index, config))
+
+    def load(ticker, lo, hi):
+        try:
+            return source.history(ticker, lo, hi), source.latest(ticker)
+        except Exception as e:
+            return e
+
+    # 티커별 이력 · 최신 가격 요청은 서로 의존하지 않으므로 동시에 보냅니다.
+    loaded = run_parallel({ticker: lambda t=ticker, w=window: load(t, *w) for ticker, window in windows.items()})
+    frames, latest = {}, {}
+    for ticker, result in loaded.items():
+        if isinstance(result, Exception):
+            # 불러오지 못한 티커의 설정은 작업을 만들지 않고 오류 줄로 돌려줍니다.
+            for index, config in groups.pop(ticker, []):
+                errors.append({"index": index, "error": str(result)})
+            continue
+        frames[ticker], latest[ticker] = result
+
+    tasks = []
+    for ticker, group in groups.items():
+        group_frames = {t: frames[t] for t in (ticker, KRW_TICKER) if t in frames}
+        group_latest = {t: latest[t] for t in group_frames}
+        group_indexes = {}
+        for key in {(INTERVAL_FREQ_MAP[c["interval_option"]], c["overseas_investment"]) for _, c in group}:
+            try:
+                group_indexes[key] = source.reciprocal_index(ticker, *key)
+            except Exception:
+                # 색인을 만들지 못하면 해당 설정들은 전체 경로로 계산
+                logger.warning("%s %s 색인을 만들지 못했습니다.", ticker, key, exc_info=True)
+        if shared:
+            # 색인을 찾으면서 티커가 공유 배열로 게시되므로 대부분 참조만 보냅니다.
+            group_frames = {t: _shared_ref(source, t, *windows[t]) or frame for t, frame in group_frames.items()}
+            group_indexes = {
+                (freq, overseas): (f"{ticker}/KRW" if overseas else ticker, freq, index.fingerprint) if index is not None else None
+                for (freq, overseas), index in group_indexes.items()
+            }
+        for i in range(0, len(group), task_size):
+            tasks.append((group_frames, group_latest, group_indexes, group[i:i + task_size]))
+    return errors, tasks
+
+
+def run_batch(items, source, workers=None, chunk_size=10000, task_size=256, ordered=True):
+    # (번호, 설정) 을 받아 결과 줄을 순서대로(ordered) 또는 계산이 끝나는 대로 내보내는 제너레이터
+    items = iter(items)
+    pool = None
+    if workers and workers > 1:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(source.shared.root, source.indexes.root))
+    try:
+        while True:
+            chunk = list(islice(items, chunk_size))
+            if not chunk:
+                break
+            errors, tasks = plan_chunk(chunk, source, task_size, shared=pool is not None)
+            if pool is None:
+                done = (_run_group(task) for task in tasks)
+            else:
+                done = (future.result() for future in as_completed([pool.submit(_run_group, task) for task in tasks]))
+            if ordered:
+                lines = errors + [line for lines in done for line in lines]
+                yield from sorted(lines, key=lambda line: line["index"])
+            else:
+                yield from errors
+                for lines in done:
+                    yield from lines
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+def flatten(line):
+    # Parquet 한 행: 결과 요약 열을 펼치고 경고 목록은 줄바꿈으로 이어 붙입니다.
+    row = {"index": line["index"], "error": line.get("error")}
+    for key, value in (line.get("result") or {}).items():
+        row[key] = "\n".join(value) if key == "warnings" else value
+    return row
+
+
+class JsonlWriter:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, line):
+        self.stream.write(json.dumps(line, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self.stream.flush()
+        if self.stream is not sys.stdout:
+            self.stream.close()
+
+
+class ParquetWriter:
+    # pyarrow 가 있을 때만 사용할 수 있습니다. row_group_size 줄마다 한 번씩 기록합니다.
+    def __init__(self, path, row_group_size=10000):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ValueError("Parquet 출력에는 pyarrow 가 필요합니다. (pip install pyarrow)")
+        self.path = path
+        self.row_group_size = row_group_size
+        self._rows = []
+        self._writer = None
+
+    def write(self, line):
+        self._rows.append(flatten(line))
+        if len(self._rows) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if not self._rows:
+            return
+        schema = pa.schema([(name, getattr(pa, dtype)()) for name, dtype in PARQUET_COLUMNS])
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, schema)
+        self._writer.write_table(pa.Table.from_pylist(self._rows, schema=schema))
+        self._rows = []
+
+    def close(self):
+        self._flush()
+        if self._writer is not None:
+            self._writer.close()
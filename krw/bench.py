@@ -0,0 +1,334 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from krw import goal_seek
+from krw.config import INTERVAL_FREQ_MAP, normalize_config
+from krw.data import PriceSource
+from krw.fx import frame_fingerprint
+from krw.history import KRW_TICKER, KRW_TZ, load_krw_history
+from krw.pipeline import Pipeline, run_stages
+from krw.prefix import build_index
+from krw.shared import SharedPrices
+from krw.simulation import indexed_simulate, prepare, risk_scenarios, run_scenarios, scenario_result
+from krw.store import BUNDLED_KRW_CSV, PriceStore, StandInProvider, read_close_csv
+
+# ===================================#
+# 성능 측정 (오프라인 고정 데이터)        #
+# ===================================#
+# 번들 krw.csv 와 시드를 고정한 합성 가격 시계열(1천 ~ 1백만 행)만 사용하므로
+# 네트워크 없이 언제나 같은 입력으로 측정됩니다. 결과는 JSON 으로 저장해
+# 커밋 사이에 --compare 로 비교합니다.
+#
+#   python -m krw.bench --output bench.json
+#   python -m krw.bench --quick --compare bench.json
+#   python -m krw.bench --quick --app          # app.py 콜드 스타트 · 재실행 시간 포함
+
+SYNTHETIC_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+QUICK_SIZES = (1_000, 10_000, 100_000)
+
+BENCH_CONFIG = {
+    "asset_ticker": KRW_TICKER,
+    "time_range": "20년",
+    "selected_date": "2024-06-01",
+    "purchase_period_years": 10.0,
+    "holding_period_years": 2.0,
+    "interest_rate_percent": 3.0,
+    "compound_interest_rate_percent": 2.0,
+    "risk_adjustment": 1.0
+}
+LATEST_PRICE = 1380.0
+
+
+def measure(fn, repeat=5, warmup=1):
+    # 준비 실행 후 repeat 번 측정한 소요 시간(ms) 목록
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def record(name, timings, **params):
+    return {
+        "name": name,
+        "params": params,
+        "repeat": len(timings),
+        "min_ms": min(timings),
+        "median_ms": statistics.median(timings),
+        "mean_ms": statistics.fmean(timings),
+    }
+
+
+def synthetic_series(n_rows, seed=0):
+    # 1시간 간격 기하 랜덤 워크 (1백만 행도 pandas 날짜 범위 안에 들어옵니다)
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("1990-01-01", periods=n_rows, freq="h", tz=KRW_TZ, name="Date")
+    close = 1000 * np.exp(np.cumsum(rng.normal(0, 0.001, n_rows)))
+    return pd.DataFrame({"Close": close}, index=index)
+
+
+def bench_simulation(krw_frame, repeat):
+    results = []
+    for interval in INTERVAL_FREQ_MAP:
+        config = normalize_config({**BENCH_CONFIG, "interval_option": interval})
+
+        def run_simulation():
+            prepared = prepare(config, krw_frame, latest_price=LATEST_PRICE)
+            return scenario_result(prepared, run_scenarios(prepared, [config["interest_rate_percent"]], [config["compound_interest_rate_percent"]]), 0)
+
+        results.append(record("run_simulation", measure(run_simulation, repeat), interval_option=interval))
+
+    # 해외 자산 경로: 같은 가격을 자산과 환율로 함께 써서 원화 환산 공동 행렬 비용까지 측정
+    overseas = normalize_config({**BENCH_CONFIG, "asset_ticker": "BENCH", "interval_option": "1개월", "overseas_investment": True})
+    overseas_path = lambda: risk_scenarios(prepare(overseas, krw_frame, krw_frame, LATEST_PRICE, LATEST_PRICE))
+    results.append(record("three_scenarios", measure(overseas_path, repeat), interval_option="1개월", overseas_investment=True))
+
+    config = normalize_config({**BENCH_CONFIG, "interval_option": "1개월"})
+    main_path = lambda: risk_scenarios(prepare(config, krw_frame, latest_price=LATEST_PRICE))
+    results.append(record("three_scenarios", measure(main_path, repeat), interval_option="1개월"))
+
+    # 1/가격 누적합 색인: 격자 정렬 · 누적 없이 색인 구간 질의로 같은 요약을 계산
+    index = build_index(krw_frame, INTERVAL_FREQ_MAP["1개월"], frame_fingerprint(krw_frame))
+    indexed_path = lambda: indexed_simulate(config, index, krw_frame, latest_price=LATEST_PRICE)
+    results.append(record("indexed_simulate", measure(indexed_path, repeat), interval_option="1개월"))
+
+    # 이자율만 바뀐 재실행: 격자 정렬 · 납입 누적은 단계 캐시에서 재사용하고 이자율 적용만 다시 계산
+    pipe = Pipeline()
+    load_inputs = lambda *args: {"prices": krw_frame, "usdkrw_prices": None, "latest_price": LATEST_PRICE, "latest_exchange_rate": 1}
+    rates = itertools.count()
+    rate_change = lambda: run_stages(pipe, {**config, "interest_rate_percent": next(rates) / 100}, load_inputs)
+    results.append(record("rate_change_rerun", measure(rate_change, repeat), interval_option="1개월"))
+
+    prepared = prepare({**BENCH_CONFIG, "interval_option": "1일"}, krw_frame, latest_price=LATEST_PRICE)
+    daily = normalize_config({**BENCH_CONFIG, "interval_option": "1일"})
+    solve_investment = lambda: goal_seek.solve_required_investment(
+        prepared["effective_purchase_prices"], 1e9, daily["interest_rate_percent"],
+        daily["compound_interest_rate_percent"], daily["conversion_period_years"], prepared["base_effective_price"]
+    )
+    results.append(record("find_required_investment", measure(solve_investment, repeat), interval_option="1일"))
+    solve_periods = lambda: goal_seek.solve_required_periods(
+        prepared["effective_price_series"], prepared["start_date"], prepared["end_date"], INTERVAL_FREQ_MAP["1일"],
+        daily["investment_per_period"], 1e9, daily["interest_rate_percent"], daily["compound_interest_rate_percent"],
+        daily["total_period_years"], daily["holding_period_years"], prepared["base_effective_price"]
+    )
+    results.append(record("find_required_periods", measure(solve_periods, repeat), interval_option="1일"))
+    return results
+
+
+def bench_alignment(sizes, repeat):
+    # 시간 단위 시계열을 일 단위 격자에 ffill 로 맞추는 비용
+    results = []
+    for n_rows in sizes:
+        frame = synthetic_series(n_rows)
+        grid = pd.date_range(frame.index[0].normalize(), frame.index[-1], freq="D", tz=KRW_TZ)
+        timings = measure(lambda: frame.reindex(grid, method="ffill"), repeat)
+        results.append(record("reindex_ffill", timings, rows=n_rows, grid=len(grid)))
+    return results
+
+
+def bench_loading(sizes, repeat, work_dir):
+    results = [record("read_close_csv", measure(lambda: read_close_csv(BUNDLED_KRW_CSV, tz=KRW_TZ), repeat), rows="krw.csv")]
+    cache_dir = os.path.join(work_dir, "npy")
+    load_krw_history(cache_dir=cache_dir)
+    results.append(record("load_krw_history_mmap", measure(lambda: load_krw_history(cache_dir=cache_dir), repeat), rows="krw.csv"))
+    try:
+        import pyarrow  # noqa: F401
+        has_parquet = True
+    except ImportError:
+        has_parquet = False
+
+    for n_rows in sizes:
+        frame = synthetic_series(n_rows)
+        csv_path = os.path.join(work_dir, f"synthetic_{n_rows}.csv")
+        frame["Close"].tz_localize(None).to_csv(csv_path)
+        results.append(record("read_close_csv", measure(lambda: read_close_csv(csv_path, tz=KRW_TZ), repeat), rows=n_rows))
+        if has_parquet:
+            parquet_path = os.path.join(work_dir, f"synthetic_{n_rows}.parquet")
+            frame.to_parquet(parquet_path)
+            results.append(record("read_parquet", measure(lambda: pd.read_parquet(parquet_path), repeat), rows=n_rows))
+    return results
+
+
+def bench_cold_load(repeat, work_dir, latency=0.02):
+    # 빈 저장소에서 해외 자산 한 번의 입력(자산 · 환율 이력, 최신 가격 · 환율)을 읽는 시간
+    # 오프라인 대역 공급자가 요청마다 latency 초 지연하므로 순차 요청은 대략 그 합, 동시 요청은 대략 최댓값입니다.
+    krw_history = load_krw_history(cache_dir=os.path.join(work_dir, "npy"))
+    counter = iter(range(10 ** 9))
+
+    def new_source():
+        store = PriceStore(root=os.path.join(work_dir, f"cold_{next(counter)}"), provider=StandInProvider(latency=latency))
+        return PriceSource(store, krw_history=krw_history)
+
+    def sequential():
+        source = new_source()
+        source.history("BENCH", "2010-01-01", "2024-01-01")
+        source.history(KRW_TICKER, "2010-01-01", "2024-01-01")
+        source.latest("BENCH")
+        source.latest(KRW_TICKER)
+
+    concurrent = lambda: new_source().inputs("BENCH", "2010-01-01", "2024-01-01", overseas_investment=True)
+    latency_ms = int(latency * 1000)
+    return [
+        record("cold_load", measure(sequential, repeat), mode="sequential", latency_ms=latency_ms),
+        record("cold_load", measure(concurrent, repeat), mode="concurrent", latency_ms=latency_ms),
+        *bench_worker_read(repeat, work_dir),
+    ]
+
+
+def bench_worker_read(repeat, work_dir):
+    # 새 워커 프로세스가 이미 받아 둔 전체 이력을 처음 읽는 비용: SQLite 저장소 vs 공유 가격 배열(메모리 맵)
+    source = PriceSource(PriceStore(root=os.path.join(work_dir, "warm"), provider=StandInProvider()))
+    source.publish("BENCH", "2000-01-01")
+    end = pd.Timestamp.today().normalize()
+    from_store = lambda: source.store.read("BENCH", "2000-01-01", end)
+    from_shared = lambda: SharedPrices(source.shared.root).get("BENCH", "2000-01-01", end)
+    return [
+        record("worker_first_read", measure(from_store, repeat), source="sqlite"),
+        record("worker_first_read", measure(from_shared, repeat), source="shared"),
+    ]
+
+
+APP_PATH = os.path.join(os.path.dirname(BUNDLED_KRW_CSV), "app.py")
+
+# 새 프로세스에서 app.py 를 한 번 실행하고 그 시간(ms)을 출력하는 스크립트
+APP_COLD_START = """
+import sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=300)
+at.session_state["authenticated"] = True
+at.session_state["date_input"] = __import__("datetime").date(2024, 6, 1)
+at.run()
+print((time.perf_counter() - started) * 1000)
+"""
+
+
+def bench_app(repeat, work_dir):
+    # Streamlit 스크립트 시간: 새 프로세스의 첫 실행(import 포함)과 같은 프로세스의 재실행(탭별)
+    # 네트워크 없이 번들 krw.csv 만 쓰도록 오프라인 공급자로 실행합니다.
+    from streamlit.testing.v1 import AppTest
+
+    env = {**os.environ, "KRW_PRICE_PROVIDER": "offline", "KRW_PRICE_STORE": os.path.join(work_dir, "app")}
+    cold = []
+    for _ in range(min(repeat, 3)):
+        done = subprocess.run([sys.executable, "-c", APP_COLD_START, APP_PATH], env=env, capture_output=True, text=True, check=True)
+        cold.append(float(done.stdout.strip().splitlines()[-1]))
+    results = [record("app_cold_start", cold)]
+
+    saved = {k: os.environ.get(k) for k in ("KRW_PRICE_PROVIDER", "KRW_PRICE_STORE")}
+    os.environ.update({k: env[k] for k in saved})
+    try:
+        at = AppTest.from_file(APP_PATH, default_timeout=300)
+        at.session_state["authenticated"] = True
+        at.session_state["date_input"] = pd.Timestamp("2024-06-01").date()
+        at.run()
+        for tab in ("📊 투자 성과", "📈 가격 및 차트"):
+            at.session_state["main_tabs"] = tab
+            results.append(record("app_rerun", measure(at.run, repeat), tab=tab))
+    finally:
+        for k, v in saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(BUNDLED_KRW_CSV), check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": pd.Timestamp.now(tz="UTC").isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run(sizes=SYNTHETIC_SIZES, repeat=5, app=False):
+    krw_frame = read_close_csv(BUNDLED_KRW_CSV, tz=KRW_TZ)
+    with tempfile.TemporaryDirectory() as work_dir:
+        results = (bench_simulation(krw_frame, repeat) + bench_alignment(sizes, repeat)
+                   + bench_loading(sizes, repeat, work_dir) + bench_cold_load(repeat, work_dir))
+        if app:
+            results += bench_app(repeat, work_dir)
+    return {"environment": environment(), "results": results}
+
+
+def result_key(result):
+    return result["name"], json.dumps(result["params"], sort_keys=True, ensure_ascii=False)
+
+
+def compare(baseline, current, threshold=1.2):
+    # 같은 이름 · 파라미터끼리 중앙값 비율을 계산하고 threshold 배 이상 느려진 항목을 표시합니다.
+    before = {result_key(r): r for r in baseline["results"]}
+    rows = []
+    for result in current["results"]:
+        old = before.get(result_key(result))
+        if old is None:
+            continue
+        ratio = result["median_ms"] / old["median_ms"] if old["median_ms"] else float("inf")
+        rows.append({
+            "name": result["name"],
+            "params": result["params"],
+            "baseline_ms": old["median_ms"],
+            "current_ms": result["median_ms"],
+            "ratio": ratio,
+            "regression": ratio >= threshold,
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="krw.bench", description="오프라인 고정 데이터로 성능을 측정합니다.")
+    parser.add_argument("--output", help="결과 JSON 저장 경로 (기본: 표준 출력)")
+    parser.add_argument("--repeat", type=int, default=5, help="항목별 측정 횟수")
+    parser.add_argument("--quick", action="store_true", help="1백만 행 합성 데이터 제외")
+    parser.add_argument("--app", action="store_true", help="Streamlit 스크립트 콜드 스타트 · 재실행 시간도 측정")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    parser.add_argument("--threshold", type=float, default=1.2, help="회귀로 표시할 중앙값 비율")
+    args = parser.parse_args(argv)
+
+    report = run(QUICK_SIZES if args.quick else SYNTHETIC_SIZES, args.repeat, args.app)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            rows = compare(json.load(f), report, args.threshold)
+        for row in rows:
+            mark = "  <-- 느려짐" if row["regression"] else ""
+            print(f"{row['name']:<28} {json.dumps(row['params'], ensure_ascii=False):<40} "
+                  f"{row['baseline_ms']:>10.2f}ms -> {row['current_ms']:>10.2f}ms  x{row['ratio']:.2f}{mark}", file=sys.stderr)
+        return 1 if any(row["regression"] for row in rows) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
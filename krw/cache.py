@@ -0,0 +1,254 @@
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from krw import metrics
+from krw.store import _day, _empty_frame, merge_ranges, missing_ranges
+
+# ===================================#
+# 가격 캐시 (확정 구간 / 실시간 꼬리 분리)  #
+# ===================================#
+# 오늘 이전의 봉은 바뀌지 않으므로 티커별로 받아 둔 구간의 합집합을 영구 캐시하고,
+# 오늘 봉과 최신 가격만 짧은 TTL 로 캐시해 필요할 때 그 부분만 무효화합니다.
+# 같은 키를 동시에 요청하면 한 번만 가져와 결과를 나눠 씁니다.
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    # 같은 키의 동시 요청을 하나의 실제 호출로 합칩니다.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
+
+def slice_range(frame, start, end):
+    # 정렬된 인덱스에서 [start, end) 위치를 찾아 복사 없이 잘라 냅니다.
+    tz = frame.index.tz
+    bounds = [pd.Timestamp(start), pd.Timestamp(end)]
+    if tz is not None:
+        bounds = [b.tz_localize(tz) for b in bounds]
+    lo, hi = frame.index.searchsorted(bounds, side="left")
+    return frame.iloc[lo:hi]
+
+
+class _RangeEntry:
+    def __init__(self):
+        self.frame = None
+        self.covered = []
+        self.nbytes = 0
+
+
+class RangeCache:
+    # 티커별로 받아 둔 구간의 합집합을 하나의 정렬된 프레임으로 보관합니다.
+    # 부분 구간은 잘라서 돌려주고, 덮이지 않은 구간만 가져옵니다.
+    # 전체 메모리가 max_bytes 를 넘으면 가장 오래 쓰지 않은 티커부터 버립니다.
+    def __init__(self, fetch_fn, max_bytes=256 * 1024 * 1024, flight=None, fetch_many_fn=None):
+        self.fetch_fn = fetch_fn
+        self.fetch_many_fn = fetch_many_fn
+        self.max_bytes = max_bytes
+        self._flight = flight or SingleFlight()
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    @property
+    def nbytes(self):
+        with self._lock:
+            return sum(entry.nbytes for entry in self._entries.values())
+
+    def tickers(self):
+        with self._lock:
+            return list(self._entries)
+
+    def _merge(self, ticker, fetched):
+        with self._lock:
+            entry = self._entries.get(ticker) or _RangeEntry()
+            frames = [f for f in [entry.frame] + [frame for _, _, frame in fetched] if f is not None and not f.empty]
+            if frames:
+                merged = pd.concat(frames) if len(frames) > 1 else frames[0]
+                merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+            else:
+                merged = fetched[0][2] if entry.frame is None else entry.frame
+            entry.frame = merged
+            entry.covered = merge_ranges(entry.covered + [(gs, ge) for gs, ge, _ in fetched])
+            entry.nbytes = int(merged.memory_usage(index=True).sum())
+            self._entries[ticker] = entry
+            self._entries.move_to_end(ticker)
+            while len(self._entries) > 1 and sum(e.nbytes for e in self._entries.values()) > self.max_bytes:
+                self._entries.popitem(last=False)
+
+    def get(self, ticker, start, end):
+        start, end = _day(start), _day(end)
+        with self._lock:
+            entry = self._entries.get(ticker)
+            covered = list(entry.covered) if entry is not None else []
+        gaps = missing_ranges(start, end, covered)
+        metrics.incr("price_cache_requests_total", kind="range", result="miss" if gaps else "hit")
+        if gaps:
+            fetched = [
+                (gs, ge, self._flight.do(("range", ticker, gs, ge), lambda gs=gs, ge=ge: self.fetch_fn(ticker, gs, ge)))
+                for gs, ge in gaps
+            ]
+            self._merge(ticker, fetched)
+        with self._lock:
+            entry = self._entries.get(ticker)
+            if entry is not None:
+                self._entries.move_to_end(ticker)
+        if entry is None or entry.frame is None:
+            return _empty_frame()
+        return slice_range(entry.frame, start, end)
+
+    def get_many(self, tickers, start, end):
+        # 빈 구간이 있는 티커들을 한 번의 fetch_many_fn 호출로 채운 뒤 티커별로 잘라 돌려줍니다.
+        start, end = _day(start), _day(end)
+        with self._lock:
+            gaps = {t: missing_ranges(start, end, self._entries[t].covered if t in self._entries else []) for t in tickers}
+        needed = tuple(t for t in tickers if gaps[t])
+        if needed and self.fetch_many_fn is not None:
+            lo = min(gaps[t][0][0] for t in needed)
+            hi = max(gaps[t][-1][1] for t in needed)
+            frames = self._flight.do(("ranges", needed, lo, hi), lambda: self.fetch_many_fn(list(needed), lo, hi))
+            for ticker in needed:
+                self._merge(ticker, [(lo, hi, frames.get(ticker, _empty_frame()))])
+        return {t: self.get(t, start, end) for t in tickers}
+
+    def clear(self, ticker=None):
+        with self._lock:
+            if ticker is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(ticker, None)
+
+
+class PriceCache:
+    def __init__(self, history_fn, latest_fn, live_ttl=300, max_bytes=256 * 1024 * 1024, clock=time.monotonic,
+                 history_many_fn=None, shared=None):
+        # shared: 프로세스 간 공유 가격 배열(krw.shared.SharedPrices). 게시된 확정 구간은 여기서 바로 읽습니다.
+        self.history_fn = history_fn
+        self.shared = shared
+        self.latest_fn = latest_fn
+        self.live_ttl = live_ttl
+        self.clock = clock
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self.ranges = RangeCache(history_fn, max_bytes=max_bytes, flight=self._flight, fetch_many_fn=history_many_fn)
+        self._live = {}
+
+    def _today(self):
+        return pd.Timestamp.today().normalize()
+
+    def _get_live(self, key, fn):
+        now = self.clock()
+        with self._lock:
+            entry = self._live.get(key)
+            if entry is not None and entry[0] > now:
+                metrics.incr("price_cache_requests_total", kind=key[0], result="hit")
+                return entry[1]
+        metrics.incr("price_cache_requests_total", kind=key[0], result="miss")
+        value = self._flight.do(key, fn)
+        with self._lock:
+            now = self.clock()
+            self._live = {k: v for k, v in self._live.items() if v[0] > now}
+            self._live[key] = (now + self.live_ttl, value)
+        return value
+
+    def history(self, ticker, start, end):
+        # [start, end) 가격: 오늘 이전 구간은 영구 캐시, 오늘 이후 꼬리는 TTL 캐시
+        start, end = _day(start), _day(end)
+        today = self._today()
+        parts = []
+        closed_end = min(end, today)
+        if start < closed_end:
+            parts.append(self._closed(ticker, start, closed_end))
+        parts.append(self._tail(ticker, start, end))
+        return self._combine(parts)
+
+    def _closed(self, ticker, start, end):
+        frame = self.shared.get(ticker, start, end) if self.shared is not None else None
+        if frame is not None:
+            metrics.incr("price_cache_requests_total", kind="shared", result="hit")
+            return frame
+        return self.ranges.get(ticker, start, end)
+
+    def _tail(self, ticker, start, end):
+        tail_start = max(start, self._today())
+        if tail_start >= end:
+            return None
+        key = ("tail", ticker, tail_start, end)
+        return self._get_live(key, lambda: self.history_fn(ticker, tail_start, end))
+
+    @staticmethod
+    def _combine(parts):
+        parts = [p for p in parts if p is not None]
+        parts = [p for p in parts if not p.empty] or parts[:1]
+        if not parts:
+            return _empty_frame()
+        if len(parts) == 1:
+            return parts[0]
+        return pd.concat(parts)
+
+    def history_many(self, tickers, start, end):
+        # 여러 티커를 한 번에: 확정 구간은 일괄 요청, 오늘 이후 꼬리는 티커별 TTL 캐시
+        start, end = _day(start), _day(end)
+        closed_end = min(end, self._today())
+        closed = {}
+        if start < closed_end:
+            if self.shared is not None:
+                closed = {t: self.shared.get(t, start, closed_end) for t in tickers}
+                closed = {t: frame for t, frame in closed.items() if frame is not None}
+                if closed:
+                    metrics.incr("price_cache_requests_total", len(closed), kind="shared", result="hit")
+            rest = [t for t in tickers if t not in closed]
+            if rest:
+                closed.update(self.ranges.get_many(rest, start, closed_end))
+        frames = {}
+        for ticker in tickers:
+            if end <= closed_end:
+                frames[ticker] = closed[ticker]
+            else:
+                frames[ticker] = self._combine([closed.get(ticker), self._tail(ticker, start, end)])
+        return frames
+
+    def latest(self, ticker):
+        return self._get_live(("latest", ticker), lambda: self.latest_fn(ticker))
+
+    def live(self, kind, ticker, fn, *key):
+        # 오늘 봉까지 읽어 만든 파생 값(예: 1/가격 색인)을 최신 가격과 같은 TTL 로 캐시합니다.
+        # invalidate_live(ticker) 에 함께 지워집니다.
+        return self._get_live((kind, ticker, *key), fn)
+
+    def invalidate_live(self, ticker=None):
+        # 오늘 봉과 최신 가격만 무효화 (확정 구간은 유지)
+        with self._lock:
+            for key in list(self._live):
+                if ticker is None or key[1] == ticker:
+                    del self._live[key]
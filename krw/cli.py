@@ -0,0 +1,63 @@
+import argparse
+import json
+import os
+import sys
+
+# ===================================#
+# 명령줄 실행                          #
+# ===================================#
+# "현재 설정 다운로드" 로 받은 JSON 파일(또는 한 줄에 설정 하나인 JSONL)을 읽어
+# 설정마다 결과 요약을 JSON 한 줄로 출력합니다.
+#
+#   python -m krw investment_config.json
+#   python -m krw configs.jsonl --offline > results.jsonl
+#   python -m krw configs.jsonl --workers 8 --unordered --output results.parquet
+
+
+def read_configs(stream, path):
+    # .jsonl / 표준 입력은 한 줄씩 지연 읽기, 그 외에는 설정 하나 또는 설정 목록
+    from krw.batch import iter_configs
+
+    if path == "-" or path.endswith(".jsonl"):
+        return iter_configs(stream)
+    loaded = json.load(stream)
+    return enumerate(loaded if isinstance(loaded, list) else [loaded])
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="krw", description="정액 투자 시뮬레이션을 설정 파일로 실행합니다.")
+    parser.add_argument("config", help="설정 JSON / JSONL 파일 경로 (- 는 표준 입력)")
+    parser.add_argument("--offline", action="store_true", help="네트워크 없이 번들 krw.csv 만 사용")
+    parser.add_argument("--store", help="로컬 가격 저장소 디렉터리")
+    parser.add_argument("--output", default="-", help="결과 파일 (.parquet 이면 Parquet, 그 외 JSONL, 기본: 표준 출력)")
+    parser.add_argument("--workers", type=int, default=0, help="프로세스 풀 크기 (0 또는 1 이면 현재 프로세스에서 계산)")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="한 번에 읽어 티커별로 묶는 설정 수")
+    parser.add_argument("--unordered", action="store_true", help="입력 순서 대신 계산이 끝나는 대로 출력")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.offline:
+        os.environ["KRW_PRICE_PROVIDER"] = "offline"
+
+    from krw.batch import JsonlWriter, ParquetWriter, run_batch
+    from krw.data import PriceSource
+    from krw.store import PriceStore
+
+    source = PriceSource(PriceStore(root=args.store))
+    stream = sys.stdin if args.config == "-" else open(args.config, encoding="utf-8")
+    if args.output.endswith(".parquet"):
+        writer = ParquetWriter(args.output, row_group_size=args.chunk_size)
+    else:
+        writer = JsonlWriter(sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8"))
+
+    failed = 0
+    with stream:
+        lines = run_batch(read_configs(stream, args.config), source, workers=args.workers,
+                          chunk_size=args.chunk_size, ordered=not args.unordered)
+        for line in lines:
+            failed += "error" in line
+            writer.write(line)
+    writer.close()
+    return 1 if failed else 0
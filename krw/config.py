@@ -0,0 +1,77 @@
+import pandas as pd
+
+# ===================================#
+# 시뮬레이션 설정                       #
+# ===================================#
+# "현재 설정 다운로드" 로 받은 JSON 과 같은 형태의 dict 를 그대로 사용합니다.
+
+# 전체 운용 기간 (년)
+TOTAL_YEARS_MAP = {
+    "1일": 1/365,
+    "1주일": 1/52,
+    "1개월": 1/12,
+    "6개월": 0.5,
+    "1년": 1,
+    "3년": 3,
+    "5년": 5,
+    "7년": 7,
+    "10년": 10,
+    "15년": 15,
+    "20년": 20
+}
+
+# 납입 간격별 날짜 격자 주기
+INTERVAL_FREQ_MAP = {
+    "1일": "D",
+    "1주": "W",
+    "1개월": "MS",
+    "1년": "AS"
+}
+
+# 납입 간격 1회에 해당하는 연 환산 기간
+INTERVAL_YEARS_MAP = {
+    "1일": 1/365,
+    "1주": 1/52,
+    "1개월": 1/12,
+    "1년": 1
+}
+
+DEFAULT_CONFIG = {
+    "asset_option": "달러 (USDKRW=X)",
+    "asset_ticker": "USDKRW=X",
+    "overseas_investment": False,
+    "time_range": "1년",
+    "interval_option": "1개월",
+    "investment_per_period": 1000000,
+    "holding_period_years": 0.0,
+    "interest_rate_percent": 0.0,
+    "compound_interest_rate_percent": 0.0,
+    "risk_adjustment": 1.0
+}
+
+
+def normalize_config(config):
+    # 누락된 항목을 기본값으로 채우고 전체 / 전환 기간 등 파생 값을 계산합니다.
+    config = {**DEFAULT_CONFIG, **config}
+    if config["time_range"] not in TOTAL_YEARS_MAP:
+        raise ValueError(f"알 수 없는 전체 운용 기간입니다: {config['time_range']}")
+    if config["interval_option"] not in INTERVAL_FREQ_MAP:
+        raise ValueError(f"알 수 없는 납입 간격입니다: {config['interval_option']}")
+
+    total_period_years = TOTAL_YEARS_MAP[config["time_range"]]
+    if total_period_years < 1 or config.get("purchase_period_years") is None:
+        config["purchase_period_years"] = total_period_years if total_period_years < 1 else total_period_years / 2
+    config["total_period_years"] = total_period_years
+    config["conversion_period_years"] = total_period_years - (config["purchase_period_years"] + config["holding_period_years"])
+    if config["conversion_period_years"] < 0:
+        raise ValueError("납입 기간과 유지 기간의 합이 전체 운용 기간을 초과합니다.")
+    config["selected_date"] = pd.Timestamp(config.get("selected_date") or pd.Timestamp.today().normalize()).strftime("%Y-%m-%d")
+    return config
+
+
+def simulation_window(config):
+    # 기준 날짜로부터 전체 운용 기간만큼 거슬러 올라간 조회 구간
+    months_total = int(round(config["total_period_years"] * 12))
+    end_date = pd.Timestamp(config["selected_date"])
+    start_date = end_date - pd.DateOffset(months=months_total)
+    return start_date, end_date, start_date.strftime("%Y-%m-%d"), (end_date + pd.DateOffset(days=1)).strftime("%Y-%m-%d")
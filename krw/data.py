@@ -0,0 +1,129 @@
+import logging
+import os
+
+import pandas as pd
+
+from krw import metrics
+from krw.cache import PriceCache
+from krw.fetch import run_parallel
+from krw.fx import frame_fingerprint, fx_start, krw_close
+from krw.history import KRW_TICKER, load_krw_history, merged_price_range
+from krw.prefix import INDEX_START, IndexStore
+from krw.shared import SharedPrices
+from krw.store import PriceStore
+
+# ===================================#
+# 가격 데이터 공급 (저장소 + 번들 이력 + 캐시) #
+# ===================================#
+# Streamlit 앱과 CLI 가 같은 경로로 가격을 읽도록 묶어 둔 진입점입니다.
+
+logger = logging.getLogger(__name__)
+
+
+class PriceSource:
+    def __init__(self, price_store=None, krw_history=None, live_ttl=300):
+        self.store = price_store or PriceStore()
+        self._krw_history = krw_history
+        self.indexes = IndexStore(os.path.join(self.store.root, "index"))
+        self.shared = SharedPrices(os.path.join(self.store.root, "shared"))
+        self.cache = PriceCache(self.load_range, self.load_latest, live_ttl=live_ttl,
+                                history_many_fn=self.load_range_many, shared=self.shared)
+
+    @property
+    def krw_history(self):
+        # 번들 krw.csv 는 처음 필요할 때 한 번만 읽어 메모리 맵 배열로 보관
+        if self._krw_history is None:
+            self._krw_history = load_krw_history()
+        return self._krw_history
+
+    def load_range(self, ticker, start, end):
+        with metrics.span("fetch"):
+            if ticker == KRW_TICKER:
+                return merged_price_range(self.krw_history, self.store, ticker, start, end)
+            return self.store.get(ticker, start, end)
+
+    def load_range_many(self, tickers, start, end):
+        # 원/달러는 번들 이력과 합치고, 나머지 티커는 저장소에서 한 번의 일괄 요청으로 가져옵니다.
+        others = [t for t in tickers if t != KRW_TICKER]
+        with metrics.span("fetch"):
+            frames = self.store.get_many(others, start, end) if others else {}
+        if KRW_TICKER in tickers:
+            frames[KRW_TICKER] = self.load_range(KRW_TICKER, start, end)
+        return frames
+
+    def load_latest(self, ticker):
+        try:
+            with metrics.span("fetch_latest"):
+                latest_price = self.store.provider.latest(ticker)
+        except Exception:
+            logger.warning("%s 최신 가격을 가져오지 못했습니다.", ticker, exc_info=True)
+            latest_price = None
+        if latest_price is None and ticker == KRW_TICKER:
+            # 네트워크가 없으면 번들 이력의 마지막 종가로 대체
+            return float(self.krw_history.closes[-1])
+        return latest_price
+
+    def history(self, ticker, start, end):
+        return self.cache.history(ticker, start, end)
+
+    def history_many(self, tickers, start, end):
+        return self.cache.history_many(tickers, start, end)
+
+    def latest(self, ticker):
+        return self.cache.latest(ticker)
+
+    def inputs(self, ticker, start, end, overseas_investment=False):
+        # 시뮬레이션 한 번에 필요한 자산 이력 · 환율 이력 · 최신 가격 · 최신 환율을 동시에 요청
+        calls = {"prices": lambda: self.history(ticker, start, end), "latest_price": lambda: self.latest(ticker)}
+        if overseas_investment:
+            # 환율은 구간 시작일에 행이 없을 수 있으므로(한국 휴장일) 앞에서부터 읽어 이어 씁니다.
+            calls["usdkrw_prices"] = lambda: self.history(KRW_TICKER, fx_start(start), end)
+            calls["latest_exchange_rate"] = lambda: self.latest(KRW_TICKER)
+        results = run_parallel(calls)
+        results.setdefault("usdkrw_prices", None)
+        results["latest_exchange_rate"] = (results.get("latest_exchange_rate") or 1) if overseas_investment else 1
+        return results
+
+    def publish(self, ticker, start=INDEX_START):
+        # 오늘 이전 확정 구간 전체를 shared/ 에 게시하고, 이 프로세스의 복사본은 버립니다.
+        # 같은 저장소를 쓰는 다른 워커 프로세스는 게시된 구간을 메모리 맵으로 바로 읽습니다.
+        today = pd.Timestamp.today().normalize()
+        published = self.shared.publish(ticker, self.load_range(ticker, start, today), start, today)
+        self.cache.ranges.clear(ticker)
+        return published
+
+    def reciprocal_index(self, ticker, freq, overseas_investment=False):
+        # 전체 이력으로 만든 1/가격 누적합 색인 (해외 자산은 원화 환산 종가 기준). 저장소 index/ 에 보관
+        # 찾은 색인은 최신 가격과 같은 TTL 동안 재사용하므로 요청마다 전체 이력을 다시 읽지 않습니다.
+        return self.cache.live("index", ticker, lambda: self._reciprocal_index(ticker, freq, overseas_investment),
+                               freq, overseas_investment)
+
+    def _reciprocal_index(self, ticker, freq, overseas_investment):
+        # 전체 이력을 읽는 김에 아직 게시되지 않은 티커는 공유 가격 배열로 게시합니다.
+        today = pd.Timestamp.today().normalize()
+        for name in (ticker, KRW_TICKER) if overseas_investment else (ticker,):
+            if not self.shared.covers(name, INDEX_START, today):
+                self.publish(name)
+        end = (today + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+        frame = self.history(ticker, INDEX_START, end)
+        if frame.empty:
+            return None
+        fingerprint = frame_fingerprint(frame)
+        key = ticker
+        if overseas_investment:
+            usdkrw = self.history(KRW_TICKER, INDEX_START, end)
+            if usdkrw.empty:
+                return None
+            fingerprint = fingerprint + frame_fingerprint(usdkrw)
+            frame = krw_close(ticker, frame, usdkrw)
+            key = f"{ticker}/KRW"
+        return self.indexes.get(key, freq, frame, fingerprint)
+
+    def refresh(self, ticker):
+        # 최근 구간만 다시 받아 로컬 저장소를 갱신하고, 캐시에서는 오늘 봉과 최신 가격만 무효화
+        today = pd.Timestamp.today().normalize()
+        self.store.get(ticker, today - pd.Timedelta(days=7), today + pd.Timedelta(days=1))
+        self.cache.invalidate_live(ticker)
+        if self.shared.published(ticker) and not self.shared.covers(ticker, INDEX_START, today):
+            self.publish(ticker)
+        return self.latest(ticker)
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+# ===================================#
+# 차트용 시계열 축소 (다운샘플링)         #
+# ===================================#
+# 차트 가로 픽셀보다 많은 점은 화면에서 구분되지 않으므로 서버에서 미리 줄여 보냅니다.
+# LTTB(Largest-Triangle-Three-Buckets)는 모양을 보존하는 점을 고르고,
+# min/max 방식은 구간마다 최저 · 최고점을 남겨 급등락을 놓치지 않습니다.
+
+
+def _as_float(x):
+    if isinstance(x, pd.DatetimeIndex):
+        return x.asi8.astype(np.float64)
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ns]").astype(np.int64).astype(np.float64)
+    return x.astype(np.float64)
+
+
+def lttb_indices(x, y, n_out):
+    # 첫 점과 마지막 점은 항상 포함하고, 나머지 n_out - 2 개 구간에서 한 점씩 고릅니다.
+    x = _as_float(x)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    # 다음 구간 평균점은 모든 구간에 대해 한 번에 계산 (마지막 구간의 다음은 끝점)
+    finite = np.isfinite(y)
+    counts = np.add.reduceat(finite.astype(np.float64), edges[:-1])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avg_x = np.add.reduceat(np.where(finite, x, 0.0), edges[:-1]) / counts
+        avg_y = np.add.reduceat(np.where(finite, y, 0.0), edges[:-1]) / counts
+    avg_x = np.append(avg_x[1:], x[-1])
+    avg_y = np.append(avg_y[1:], y[-1])
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    with np.errstate(invalid="ignore"):
+        for i in range(n_out - 2):
+            lo, hi = edges[i], edges[i + 1]
+            # 이전 선택점 a, 현재 구간 후보, 다음 구간 평균점이 만드는 삼각형 넓이(의 2배)
+            area = np.abs((x[a] - avg_x[i]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y[i] - y[a]))
+            area[np.isnan(area)] = -1.0
+            a = lo + int(np.argmax(area))
+            selected[i + 1] = a
+    return selected
+
+
+def minmax_indices(y, n_buckets):
+    # 구간마다 최저 · 최고점 위치 (양 끝점 포함, 정렬된 고유 위치)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_buckets < 1 or 2 * n_buckets + 2 >= n:
+        return np.arange(n)
+    size = -(-n // n_buckets)
+    padded = np.full(size * n_buckets, np.nan)
+    padded[:n] = y
+    buckets = padded.reshape(n_buckets, size)
+    valid = ~np.all(np.isnan(buckets), axis=1)
+    offsets = np.arange(n_buckets)[valid] * size
+    low = offsets + np.nanargmin(buckets[valid], axis=1)
+    high = offsets + np.nanargmax(buckets[valid], axis=1)
+    return np.unique(np.concatenate(([0, n - 1], low, high)))
+
+
+def downsample(x, y, n_out, method="lttb"):
+    # (x, y) 를 최대 약 n_out 개 점으로 줄입니다. method: "lttb" 또는 "minmax"
+    if method == "minmax":
+        index = minmax_indices(y, n_out // 2)
+    else:
+        index = lttb_indices(x, y, n_out)
+    return x[index], np.asarray(y)[index]
+
+
+def window_slice(x, start, end):
+    # 정렬된 날짜 축에서 [start, end] 구간의 위치 범위
+    x = pd.DatetimeIndex(x)
+    bounds = [pd.Timestamp(start), pd.Timestamp(end)]
+    if x.tz is not None:
+        bounds = [b.tz_localize(x.tz) if b.tzinfo is None else b for b in bounds]
+    lo = x.searchsorted(bounds[0], side="left")
+    hi = x.searchsorted(bounds[1], side="right")
+    return slice(lo, hi)
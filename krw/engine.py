@@ -0,0 +1,81 @@
+import numpy as np
+
+# ===================================#
+# 정액 적립식(DCA) 계산 엔진 (NumPy)      #
+# ===================================#
+# 가격 배열을 받아 결과 배열을 돌려주는 순수 함수 모음입니다.
+# Streamlit / yfinance 에 의존하지 않으므로 어디서든 재사용할 수 있습니다.
+
+
+def _purchase_counts(n, like):
+    # 1..n 납입 횟수 (2차원 가격 행렬이면 자산 축으로 브로드캐스트되는 열 벡터)
+    counts = np.arange(1, n + 1, dtype=np.float64)
+    return counts.reshape((n,) + (1,) * (np.ndim(like) - 1))
+
+
+def cumulative_reciprocal(prices):
+    # 1/가격 의 누적합: 매 기간 1원씩 납입했을 때의 누적 매입 수량
+    # prices 가 (날짜 × 자산) 행렬이면 자산별로 날짜 축을 따라 누적합니다.
+    return np.cumsum(1.0 / np.asarray(prices, dtype=np.float64), axis=0)
+
+
+def rate_multiplier(interest_rate, compound_rate, conversion_years):
+    # 유지 종료 시 약정 이자 1회 + 전환 기간 동안 연 복리 적용 배수
+    # 배열을 넘기면 시나리오별 배수를 한 번에 계산합니다.
+    interest_rate = np.asarray(interest_rate, dtype=np.float64)
+    compound_rate = np.asarray(compound_rate, dtype=np.float64)
+    multiplier = 1 + interest_rate / 100
+    if conversion_years > 0:
+        multiplier = multiplier * (1 + compound_rate / 100) ** conversion_years
+    return multiplier
+
+
+def accumulate_purchases(purchase_prices, investment_amt):
+    # 이자율과 무관한 부분: 납입 수량, 평균 매입 가격, 누적 평균 가격 시계열
+    cumulative_recip = cumulative_reciprocal(purchase_prices)
+    cumulative_units = investment_amt * cumulative_recip
+    n_purchases = len(cumulative_recip)
+
+    total_investment_purchase = investment_amt * n_purchases
+    total_units_purchase = cumulative_units[-1] if n_purchases else np.zeros(np.shape(cumulative_units)[1:])[()]
+
+    return {
+        "total_investment_purchase": total_investment_purchase,
+        "total_units_purchase": total_units_purchase,
+        "final_effective_price_purchase": total_investment_purchase / total_units_purchase,
+        "cumulative_units": cumulative_units,
+        "cumulative_effective_prices": _purchase_counts(n_purchases, cumulative_recip) / cumulative_recip,
+    }
+
+
+def apply_rate_scenarios(purchases, interest_rates, compound_rates, conversion_years, base_price):
+    # 이자율 시나리오 벡터를 한 번에 적용합니다. 결과는 시나리오별 배열입니다.
+    total_investment_purchase = purchases["total_investment_purchase"]
+    final_units_final = purchases["total_units_purchase"] * rate_multiplier(interest_rates, compound_rates, conversion_years)
+    final_holding_value = final_units_final * base_price
+    profit_rate = ((final_holding_value - total_investment_purchase) / total_investment_purchase) * 100
+    return {
+        "interest_rate": np.asarray(interest_rates, dtype=np.float64),
+        "compound_rate": np.asarray(compound_rates, dtype=np.float64),
+        "final_units_final": final_units_final,
+        "final_holding_value": final_holding_value,
+        "profit_rate": profit_rate,
+    }
+
+
+def rate_fan(interest_rate, compound_rate, offsets):
+    # 기본 이자율에 ±오프셋을 더한 시나리오 이자율 배열 (예: offsets=[-3, -2, -1, 0, 1, 2, 3])
+    offsets = np.asarray(offsets, dtype=np.float64)
+    return interest_rate + offsets, compound_rate + offsets
+
+
+def simulate_dca(purchase_prices, investment_amt, interest_rate, compound_rate,
+                 conversion_years, base_price):
+    purchases = accumulate_purchases(purchase_prices, investment_amt)
+    scenarios = apply_rate_scenarios(purchases, interest_rate, compound_rate, conversion_years, base_price)
+    return {
+        **purchases,
+        "final_units_final": scenarios["final_units_final"],
+        "final_holding_value": scenarios["final_holding_value"],
+        "profit_rate": scenarios["profit_rate"],
+    }
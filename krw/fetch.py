@@ -0,0 +1,56 @@
+import contextvars
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+# ===================================#
+# 네트워크 요청 (시간 제한 · 재시도 · 병렬)  #
+# ===================================#
+# 공급자 호출은 전용 스레드 풀에서 실행해 timeout 초가 지나면 기다리지 않고 실패로 처리하고,
+# 실패하면 backoff, 2 × backoff, 4 × backoff ... 초 쉬었다가 다시 시도합니다.
+# 서로 의존하지 않는 요청(자산 이력, 환율 이력, 최신 가격, 최신 환율)은 한꺼번에 보내
+# 첫 로딩 시간이 요청 시간의 합이 아니라 가장 느린 요청 하나의 시간이 되도록 합니다.
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 15.0
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.5
+
+# 시간 제한용 풀: 제한 시간을 넘긴 호출은 스레드에서 끝까지 실행되지만 결과는 버립니다.
+_CALL_POOL = ThreadPoolExecutor(max_workers=16, thread_name_prefix="krw-fetch")
+
+
+def call_with_timeout(fn, timeout=DEFAULT_TIMEOUT):
+    if timeout is None:
+        return fn()
+    future = _CALL_POOL.submit(contextvars.copy_context().run, fn)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeout:
+        future.cancel()
+        raise TimeoutError(f"{timeout:g}초 안에 응답이 없습니다.") from None
+
+
+def retry_call(fn, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, label="", sleep=time.sleep):
+    # 처음 1번 + 재시도 retries 번. 마지막 시도의 예외는 그대로 올립니다.
+    for attempt in range(retries + 1):
+        try:
+            return call_with_timeout(fn, timeout)
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = backoff * 2 ** attempt
+            logger.info("%s 요청 실패(%s), %.1f초 후 다시 시도합니다. (%d/%d)", label, e, delay, attempt + 1, retries)
+            sleep(delay)
+
+
+def run_parallel(calls, max_workers=8):
+    # {이름: 인자 없는 함수} 를 동시에 실행해 {이름: 결과} 로 돌려줍니다.
+    # 호출마다 현재 contextvars 를 복사하므로 구간 계측(metrics.span)이 같은 추적에 기록됩니다.
+    if len(calls) <= 1:
+        return {name: fn() for name, fn in calls.items()}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(calls)), thread_name_prefix="krw-stage") as pool:
+        futures = {name: pool.submit(contextvars.copy_context().run, fn) for name, fn in calls.items()}
+        return {name: future.result() for name, future in futures.items()}
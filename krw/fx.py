@@ -0,0 +1,89 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from krw.alignment import gather
+
+# ===================================#
+# 원화 환산 가격 (자산 × 환율 공동 행렬)   #
+# ===================================#
+# 해외 자산은 자산 종가와 원/달러 종가를 두 인덱스의 합집합 위에 한 번 ffill 로 맞춰
+# (날짜 × [원화 환산 종가, 자산 종가, 환율]) 행렬로 만들어 둡니다.
+# 이후 날짜 격자 정렬은 국내 자산과 똑같이 이 행렬의 인덱스 하나로만 하면 됩니다.
+# 합집합 인덱스에서 격자 날짜 이하의 마지막 행은 자산 · 환율 각각의 마지막 행과 같으므로
+# 따로 정렬해 곱한 결과와 값이 같습니다.
+#
+# 원/달러(krw.csv)는 한국 영업일만 있어 구간 시작일이 한국 휴장일이면 그날 환율 행이 없습니다.
+# 그래서 환율은 구간보다 FX_LOOKBACK 앞에서부터 읽어(fx_start) 직전 환율을 이어 쓰고,
+# 공동 행렬은 자산 첫 행부터 시작합니다. 조회 구간만 읽은 앱 · API 와 전체 이력으로 만든 색인이 같은 행을 봅니다.
+
+JOINT_COLUMNS = ["Close", "Asset", "USDKRW"]
+
+# 가장 긴 한국 휴장(krw.csv 기준 11일)보다 넉넉한 환율 조회 여유
+FX_LOOKBACK = pd.Timedelta(days=31)
+
+
+def fx_start(start):
+    # start 부터의 자산 가격을 환산할 때 환율을 읽기 시작할 날짜 (문자열)
+    return (pd.Timestamp(start) - FX_LOOKBACK).strftime("%Y-%m-%d")
+
+
+def joint_close(price_data, usdkrw_data):
+    # 자산 인덱스 시간대의 합집합 인덱스(자산 첫 행부터), 열: Close(원화 환산) · Asset · USDKRW
+    # 환율은 각 행 이하의 마지막 환율 행으로 채우므로 자산 첫 행 이전의 환율은 이어 쓰기에만 쓰입니다.
+    asset_index = pd.DatetimeIndex(price_data.index)
+    fx_index = pd.DatetimeIndex(usdkrw_data.index)
+    values = np.union1d(asset_index.asi8, fx_index.asi8)
+    if len(asset_index):
+        values = values[values >= asset_index.asi8[0]]
+    index = pd.DatetimeIndex(values.astype("datetime64[ns]"), name=asset_index.name)
+    if asset_index.tz is not None:
+        index = index.tz_localize("UTC").tz_convert(asset_index.tz)
+    asset = gather(price_data["Close"].to_numpy(), np.searchsorted(asset_index.asi8, values, side="right") - 1)
+    fx = gather(usdkrw_data["Close"].to_numpy(), np.searchsorted(fx_index.asi8, values, side="right") - 1)
+    return pd.DataFrame({"Close": asset * fx, "Asset": asset, "USDKRW": fx}, index=index, columns=JOINT_COLUMNS)
+
+
+def frame_fingerprint(frame):
+    # 길이 · 첫 날짜 · 마지막 날짜 · 마지막 종가 (오늘 봉이 갱신되면 키가 달라집니다)
+    if frame.empty:
+        return (0,)
+    values = frame.index.asi8
+    return len(values), values[0], values[-1], frame["Close"].to_numpy()[-1]
+
+
+class KrwCloseCache:
+    # (티커, 자산 가격 지문, 환율 지문) → 공동 행렬
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, ticker, price_data, usdkrw_data):
+        key = (ticker, frame_fingerprint(price_data), frame_fingerprint(usdkrw_data))
+        with self._lock:
+            joint = self._entries.get(key)
+            if joint is not None:
+                self._entries.move_to_end(key)
+                return joint
+        joint = joint_close(price_data, usdkrw_data)
+        with self._lock:
+            self._entries[key] = joint
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return joint
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# 프로세스 전체가 공유하는 기본 캐시
+KRW_CLOSE_CACHE = KrwCloseCache()
+
+
+def krw_close(ticker, price_data, usdkrw_data, cache=KRW_CLOSE_CACHE):
+    return cache.get(ticker, price_data, usdkrw_data)
+
@@ -0,0 +1,125 @@
+import time
+from functools import wraps
+
+import numpy as np
+import pandas as pd
+
+from krw.alignment import date_grid
+from krw.config import INTERVAL_FREQ_MAP
+from krw.engine import cumulative_reciprocal, rate_multiplier, simulate_dca
+
+# ===================================#
+# 목표 달성 역산 (Goal-seek)            #
+# ===================================#
+# 만기 자산 가치는 납입 금액에 선형이고 이자율에 대해서도 닫힌 형태로 풀리므로
+# 반복 시뮬레이션 없이 한 번의 누적합으로 해를 구합니다.
+
+
+def _timed(func):
+    # 결과 dict 에 계산 소요 시간(ms)을 기록
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        result = func(*args, **kwargs)
+        result["elapsed_ms"] = (time.perf_counter() - started) * 1000
+        return result
+    return wrapper
+
+
+@_timed
+def solve_required_investment(purchase_prices, target, interest_rate, compound_rate,
+                              conversion_years, base_price):
+    # 목표 만기 가치를 위한 매 기간 납입 금액
+    recip = cumulative_reciprocal(purchase_prices)
+    value_per_won = (recip[-1] if len(recip) else 0.0) * rate_multiplier(interest_rate, compound_rate, conversion_years) * base_price
+    if value_per_won <= 0:
+        return {"value": None, "final_holding_value": None}
+    investment_amt = target / value_per_won
+    return {"value": investment_amt, "final_holding_value": investment_amt * value_per_won}
+
+
+@_timed
+def solve_required_interest_rate(purchase_prices, investment_amt, target, compound_rate,
+                                 conversion_years, base_price):
+    # 목표 만기 가치를 위한 유지 종료 시점 약정 이자율 (%)
+    recip = cumulative_reciprocal(purchase_prices)
+    value_without_interest = (recip[-1] if len(recip) else 0.0) * investment_amt * rate_multiplier(0.0, compound_rate, conversion_years) * base_price
+    if value_without_interest <= 0:
+        return {"value": None, "final_holding_value": None}
+    interest_rate = (target / value_without_interest - 1) * 100
+    return {"value": interest_rate, "final_holding_value": value_without_interest * (1 + interest_rate / 100)}
+
+
+def _add_months(start, months):
+    # start + pd.DateOffset(months=m) 를 m 배열에 대해 한 번에 (달의 날짜 수를 넘으면 그 달 말일)
+    wall = start.tz_localize(None) if start.tzinfo is not None else start
+    month = np.datetime64(wall.to_datetime64(), "M") + months
+    first_day = month.astype("datetime64[D]")
+    days_in_month = ((month + 1).astype("datetime64[D]") - first_day).astype(np.int64)
+    days = first_day + (np.minimum(wall.day, days_in_month) - 1)
+    ends = pd.DatetimeIndex(days.astype("datetime64[ns]") + (wall - wall.normalize()).to_timedelta64())
+    return ends.tz_localize(start.tz) if start.tzinfo is not None else ends
+
+
+@_timed
+def solve_required_periods(grid_prices, start_date, end_date, freq, investment_amt, target,
+                           interest_rate, compound_rate, total_years, holding_years, base_price):
+    # 목표 만기 가치를 위한 최소 납입 횟수.
+    # 시뮬레이션과 같이 납입 기간을 개월 단위(m)로 늘려 가며 [시작, 시작 + m개월) 납입 격자의 날짜 수를 납입 횟수로,
+    # 전체 - (m/12 + 유지) 년을 전환 기간으로 계산하고, 가장 짧은 납입 기간을 엔진으로 다시 계산해 확인합니다.
+    # grid_prices: 시작일부터의 전체 격자 가격 (prepare 의 effective_price_series)
+    if total_years < 1:
+        # 1년 미만은 납입 기간이 전체 기간으로 고정되므로 계획이 하나뿐입니다.
+        months, purchase_years = np.array([int(round(total_years * 12))]), np.array([total_years])
+    else:
+        months = np.arange(0, int(round(total_years * 12)) + 1)
+        purchase_years = months / 12
+    purchase_ends = _add_months(start_date, months)
+    # [시작, 납입 종료) 격자는 전체 격자의 앞부분이므로 위치만 찾습니다.
+    # 0개월은 pd.date_range 규칙대로 시작일이 기준일이면 1회 납입이라 격자를 직접 만듭니다.
+    grid = date_grid(start_date, end_date, freq, start_date.tz)
+    counts = np.searchsorted(grid.asi8, purchase_ends.asi8, side="left")
+    counts[months == 0] = len(date_grid(start_date, start_date, freq, start_date.tz, inclusive="left"))
+    conversion_years = total_years - (purchase_years + holding_years)
+    # 납입이 조회 구간 끝을 넘어가는 계획은 제외
+    feasible = (conversion_years >= -1e-9) & (counts > 0) & (purchase_ends <= end_date)
+    recip = np.concatenate(([0.0], cumulative_reciprocal(grid_prices)))
+    growth = (1 + compound_rate / 100) ** np.clip(conversion_years, 0, None)
+    values = investment_amt * recip[counts] * (1 + interest_rate / 100) * growth * base_price
+    for m in np.flatnonzero(feasible & (values >= target)):
+        simulated = simulate_dca(grid_prices[:counts[m]], investment_amt, interest_rate, compound_rate,
+                                 conversion_years[m], base_price)
+        if simulated["final_holding_value"] >= target:
+            return {
+                "value": int(counts[m]),
+                "purchase_years": float(purchase_years[m]),
+                "final_holding_value": float(simulated["final_holding_value"]),
+            }
+    return {"value": None, "final_holding_value": None}
+
+
+# 역산 대상 → 계산 함수 (API · 앱 공통)
+SOLVE_TARGETS = ("investment", "interest_rate", "periods")
+
+
+def solve_for_target(prepared, target, solve_for):
+    # 준비된 시뮬레이션(prepare 결과)과 그 설정으로 solve_for 를 역산
+    config = prepared["config"]
+    if solve_for == "investment":
+        return solve_required_investment(
+            prepared["effective_purchase_prices"], target, config["interest_rate_percent"],
+            config["compound_interest_rate_percent"], config["conversion_period_years"], prepared["base_effective_price"]
+        )
+    if solve_for == "interest_rate":
+        return solve_required_interest_rate(
+            prepared["effective_purchase_prices"], config["investment_per_period"], target,
+            config["compound_interest_rate_percent"], config["conversion_period_years"], prepared["base_effective_price"]
+        )
+    if solve_for == "periods":
+        return solve_required_periods(
+            prepared["effective_price_series"], prepared["start_date"], prepared["end_date"],
+            INTERVAL_FREQ_MAP[config["interval_option"]], config["investment_per_period"], target,
+            config["interest_rate_percent"], config["compound_interest_rate_percent"],
+            config["total_period_years"], config["holding_period_years"], prepared["base_effective_price"]
+        )
+    raise ValueError(f"알 수 없는 역산 대상입니다: {solve_for}")
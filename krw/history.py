@@ -0,0 +1,94 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from krw.store import BUNDLED_KRW_CSV, DEFAULT_STORE_DIR, PRICE_COLUMNS, read_close_csv
+
+# ===================================#
+# 번들 krw.csv 원/달러 장기 시계열         #
+# ===================================#
+# CSV 는 최초 1회만 파싱해 .npy 배열(날짜 ns / 종가)로 저장하고,
+# 이후에는 메모리 맵으로 열어 searchsorted 로 구간을 잘라 씁니다.
+
+KRW_TICKER = "USDKRW=X"
+KRW_TZ = "Asia/Seoul"
+
+
+class PriceHistory:
+    def __init__(self, dates, closes, tz=None):
+        # dates: 오름차순 datetime64[ns] (tz 기준 현지 시각), closes: float64
+        self.dates = dates
+        self.closes = closes
+        self.tz = tz
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def first_date(self):
+        return pd.Timestamp(self.dates[0]) if len(self) else None
+
+    @property
+    def last_date(self):
+        return pd.Timestamp(self.dates[-1]) if len(self) else None
+
+    def bounds(self, start, end):
+        # [start, end) 에 해당하는 위치 (O(log n))
+        lo, hi = np.searchsorted(self.dates, np.array([start, end], dtype="datetime64[ns]"), side="left")
+        return int(lo), int(hi)
+
+    def slice(self, start, end):
+        lo, hi = self.bounds(start, end)
+        return PriceHistory(self.dates[lo:hi], self.closes[lo:hi], self.tz)
+
+    def to_frame(self):
+        index = pd.DatetimeIndex(np.asarray(self.dates), name="Date")
+        if self.tz is not None:
+            index = index.tz_localize(self.tz)
+        return pd.DataFrame({"Close": np.asarray(self.closes)}, index=index).reindex(columns=PRICE_COLUMNS)
+
+
+def _cache_paths(cache_dir):
+    return os.path.join(cache_dir, "krw_csv_dates.npy"), os.path.join(cache_dir, "krw_csv_close.npy")
+
+
+def _save_atomic(path, array):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+def load_krw_history(csv_path=BUNDLED_KRW_CSV, cache_dir=None):
+    cache_dir = cache_dir or os.environ.get("KRW_PRICE_STORE", DEFAULT_STORE_DIR)
+    os.makedirs(cache_dir, exist_ok=True)
+    dates_path, close_path = _cache_paths(cache_dir)
+
+    csv_mtime = os.path.getmtime(csv_path)
+    fresh = all(os.path.exists(p) and os.path.getmtime(p) >= csv_mtime for p in (dates_path, close_path))
+    if not fresh:
+        frame = read_close_csv(csv_path).sort_index()
+        _save_atomic(close_path, frame["Close"].to_numpy(dtype=np.float64))
+        _save_atomic(dates_path, frame.index.to_numpy(dtype="datetime64[ns]"))
+
+    return PriceHistory(np.load(dates_path, mmap_mode="r"), np.load(close_path, mmap_mode="r"), tz=KRW_TZ)
+
+
+def merged_price_range(history, price_store, ticker, start, end):
+    # 번들 이력으로 덮이는 구간은 로컬 배열에서, 그 이후 구간만 저장소(yfinance)에서 가져와 합칩니다.
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    local = history.slice(start, end).to_frame()
+    fresh_start = max(start, history.last_date + pd.Timedelta(days=1))
+    if fresh_start >= end:
+        return local
+
+    fresh = price_store.get(ticker, fresh_start, end)
+    if fresh.empty:
+        return local
+    fresh = fresh.reindex(columns=PRICE_COLUMNS)
+    # 일봉 날짜를 그대로 유지하도록 현지 날짜 기준으로 맞춥니다.
+    index = fresh.index.tz_localize(None) if fresh.index.tz is not None else fresh.index
+    fresh.index = index.normalize().tz_localize(history.tz)
+    fresh = fresh[~fresh.index.duplicated(keep="last") & (fresh.index >= fresh_start.tz_localize(history.tz))]
+    return pd.concat([local, fresh])
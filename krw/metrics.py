@@ -0,0 +1,129 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+# ===================================#
+# 구간 계측 (span) 과 카운터             #
+# ===================================#
+# 데이터 조회 · 정렬 · 시뮬레이션 · 역산 · 차트 생성 구간의 소요 시간과
+# 가격 캐시 적중 / 누락 횟수를 프로세스 단위로 모아 JSON 또는 Prometheus 텍스트로 내보냅니다.
+# start_trace() 이후 같은 실행 흐름(Streamlit 재실행 한 번)에서 열린 구간은 따로 기록해
+# 디버그 패널에 보여 줍니다.
+
+SPAN_PERCENTILES = (50, 90, 99)
+
+_trace = contextvars.ContextVar("krw_trace", default=None)
+_depth = contextvars.ContextVar("krw_span_depth", default=0)
+
+
+class _SpanStats:
+    def __init__(self, window):
+        self.count = 0
+        self.total_ms = 0.0
+        self.samples = deque(maxlen=window)
+
+
+class Metrics:
+    # window: 백분위수 계산에 쓰는 구간별 최근 표본 수
+    def __init__(self, window=1024, clock=time.perf_counter):
+        self.window = window
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._spans = {}
+        self._counters = {}
+
+    def observe(self, name, elapsed_ms):
+        with self._lock:
+            stats = self._spans.get(name)
+            if stats is None:
+                stats = self._spans[name] = _SpanStats(self.window)
+            stats.count += 1
+            stats.total_ms += elapsed_ms
+            stats.samples.append(elapsed_ms)
+
+    @contextmanager
+    def span(self, name):
+        # 추적 중이면 여는 순서대로 기록하고, 닫을 때 소요 시간을 채웁니다.
+        depth = _depth.get()
+        token = _depth.set(depth + 1)
+        entry = {"span": name, "depth": depth, "elapsed_ms": None}
+        trace = _trace.get()
+        if trace is not None:
+            trace.append(entry)
+        started = self.clock()
+        try:
+            yield
+        finally:
+            entry["elapsed_ms"] = (self.clock() - started) * 1000
+            _depth.reset(token)
+            self.observe(name, entry["elapsed_ms"])
+
+    def incr(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def start_trace(self):
+        # 현재 실행 흐름의 구간 기록을 새로 시작하고 그 목록을 돌려줍니다.
+        trace = []
+        _trace.set(trace)
+        return trace
+
+    def snapshot(self):
+        with self._lock:
+            spans = {
+                name: {
+                    "count": stats.count,
+                    "total_ms": stats.total_ms,
+                    **{f"p{p}_ms": float(v) for p, v in zip(SPAN_PERCENTILES, np.percentile(stats.samples, SPAN_PERCENTILES))},
+                }
+                for name, stats in self._spans.items()
+            }
+            counters = [{"name": name, "labels": dict(labels), "value": value} for (name, labels), value in self._counters.items()]
+        return {"spans": spans, "counters": counters}
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self, prefix="krw"):
+        snapshot = self.snapshot()
+        lines = [f"# TYPE {prefix}_span_seconds summary"]
+        for name, stats in snapshot["spans"].items():
+            for p in SPAN_PERCENTILES:
+                lines.append(f'{prefix}_span_seconds{{span="{name}",quantile="{p / 100}"}} {stats[f"p{p}_ms"] / 1000:.6f}')
+            lines.append(f'{prefix}_span_seconds_sum{{span="{name}"}} {stats["total_ms"] / 1000:.6f}')
+            lines.append(f'{prefix}_span_seconds_count{{span="{name}"}} {stats["count"]}')
+        names = sorted({counter["name"] for counter in snapshot["counters"]})
+        for name in names:
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for counter in snapshot["counters"]:
+                if counter["name"] == name:
+                    labels = ",".join(f'{k}="{v}"' for k, v in counter["labels"].items())
+                    lines.append(f"{prefix}_{name}{{{labels}}} {counter['value']}" if labels else f"{prefix}_{name} {counter['value']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        # .prom / .txt 는 Prometheus 텍스트(node_exporter textfile 수집용), 그 외는 JSON
+        # 같은 프로세스의 여러 세션(스레드)이 동시에 써도 임시 파일이 겹치지 않도록 pid · 스레드 번호를 붙입니다.
+        text = self.to_prometheus() if path.endswith((".prom", ".txt")) else self.to_json()
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+
+
+# 프로세스 전체가 공유하는 기본 레지스트리
+REGISTRY = Metrics()
+span = REGISTRY.span
+incr = REGISTRY.incr
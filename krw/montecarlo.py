@@ -0,0 +1,112 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# ===================================#
+# 몬테카를로 미래 경로 시뮬레이션          #
+# ===================================#
+# 과거 로그 수익률을 블록 단위로 재표본추출(block bootstrap)하거나
+# 로그 수익률에 맞춘 기하 브라운 운동(GBM)으로 수많은 가격 경로를 만들고,
+# 모든 경로에 같은 정액 투자 계획을 한 번에 적용합니다.
+# 경로는 (경로 × 단계) 칸 수가 MAX_CHUNK_CELLS 이하인 묶음으로 나눠 만들고, 묶음마다 만기 가치와
+# 팬 차트용 단계(최대 FAN_POINTS 개)의 가격만 남깁니다. 전체 경로 행렬은 한 번에 메모리에 올리지 않습니다.
+
+FAN_PERCENTILES = (5, 25, 50, 75, 95)
+# 묶음 하나가 한 번에 만드는 (경로 × 단계) 칸 수 상한 (float64 약 16MB)
+MAX_CHUNK_CELLS = 2_000_000
+# 팬 차트 백분위를 계산할 단계 수 상한
+FAN_POINTS = 500
+
+
+def log_returns(prices):
+    prices = np.asarray(prices, dtype=np.float64)
+    prices = prices[np.isfinite(prices) & (prices > 0)]
+    return np.diff(np.log(prices))
+
+
+def block_bootstrap_returns(returns, n_paths, n_steps, block_size, rng):
+    # 길이 block_size 의 연속 구간을 무작위로 이어 붙여 자기상관을 어느 정도 보존합니다.
+    # 시작 위치가 둘 이상 나오도록 블록은 수익률 개수보다 짧게 자릅니다 (같으면 모든 경로가 같아집니다).
+    block_size = max(1, min(block_size, len(returns) - 1))
+    n_blocks = -(-n_steps // block_size)
+    starts = rng.integers(0, len(returns) - block_size + 1, size=(n_paths, n_blocks))
+    index = (starts[:, :, None] + np.arange(block_size)).reshape(n_paths, -1)[:, :n_steps]
+    return returns[index]
+
+
+def gbm_returns(returns, n_paths, n_steps, rng):
+    return rng.normal(np.mean(returns), np.std(returns, ddof=1), size=(n_paths, n_steps))
+
+
+def price_paths(start_price, step_returns):
+    # (경로 × (단계 + 1)) 가격. 0번째 열은 현재 가격입니다.
+    n_paths = step_returns.shape[0]
+    cumulative = np.concatenate((np.zeros((n_paths, 1)), np.cumsum(step_returns, axis=1)), axis=1)
+    return start_price * np.exp(cumulative)
+
+
+def fan_steps(n_steps, max_points=FAN_POINTS):
+    # 0 ~ n_steps 중 백분위를 계산할 단계 위치 (양 끝 포함, 고르게)
+    return np.unique(np.linspace(0, n_steps, min(n_steps + 1, max_points)).round().astype(np.int64))
+
+
+def simulate_paths(paths, purchase_steps, investment_amt, multiplier):
+    # 0 ~ purchase_steps-1 단계에 납입하고 마지막 단계 가격으로 평가
+    units = investment_amt * np.sum(1.0 / paths[:, :purchase_steps], axis=1)
+    return units * multiplier * paths[:, -1]
+
+
+def _simulate_chunk(args):
+    returns, start_price, n_paths, n_steps, purchase_steps, investment_amt, multiplier, method, block_size, seed, steps = args
+    rng = np.random.default_rng(seed)
+    if method == "gbm":
+        step_returns = gbm_returns(returns, n_paths, n_steps, rng)
+    else:
+        step_returns = block_bootstrap_returns(returns, n_paths, n_steps, block_size, rng)
+    paths = price_paths(start_price, step_returns)
+    return paths[:, steps], simulate_paths(paths, purchase_steps, investment_amt, multiplier)
+
+
+def run_projection(historical_prices, start_price, n_steps, purchase_steps, investment_amt, multiplier,
+                   n_paths=10000, method="bootstrap", block_size=12, seed=None, workers=None, chunk_size=2000):
+    # workers 가 2 이상이면 경로를 chunk_size 단위로 나눠 프로세스 풀에서 계산합니다.
+    # 단계가 많으면 묶음당 칸 수가 MAX_CHUNK_CELLS 를 넘지 않도록 chunk_size 를 줄입니다.
+    # 모든 경로의 만기 가치가 같으면(수익률 변동이 없는 등) 분포가 아니므로 None 입니다.
+    returns = log_returns(historical_prices)
+    if len(returns) < 2 or n_steps < 1:
+        return None
+    block_size = max(1, min(block_size, len(returns) - 1))
+    purchase_steps = int(min(max(purchase_steps, 0), n_steps))
+    steps = fan_steps(n_steps)
+    chunk_size = max(1, min(chunk_size, MAX_CHUNK_CELLS // (n_steps + 1)))
+
+    chunk_sizes = [min(chunk_size, n_paths - i) for i in range(0, n_paths, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    jobs = [
+        (returns, start_price, size, n_steps, purchase_steps, investment_amt, multiplier, method, block_size, s, steps)
+        for size, s in zip(chunk_sizes, seeds)
+    ]
+    if workers and workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_simulate_chunk, jobs))
+    else:
+        results = [_simulate_chunk(job) for job in jobs]
+
+    fan_prices = np.concatenate([r[0] for r in results])
+    final_values = np.concatenate([r[1] for r in results])
+    if not np.ptp(final_values) > 0:
+        return None
+    invested = investment_amt * purchase_steps
+    with np.errstate(divide="ignore", invalid="ignore"):
+        profit_rate = (final_values - invested) / invested * 100
+    return {
+        "final_holding_value": final_values,
+        "profit_rate": profit_rate,
+        "total_investment_purchase": invested,
+        "fan": dict(zip(FAN_PERCENTILES, np.percentile(fan_prices, FAN_PERCENTILES, axis=0))),
+        "fan_steps": steps,
+        "value_percentiles": dict(zip(FAN_PERCENTILES, np.percentile(final_values, FAN_PERCENTILES))),
+        "loss_probability": float(np.mean(final_values < invested)),
+        "block_size": block_size,
+        "sample_size": len(returns),
+    }
@@ -0,0 +1,89 @@
+import threading
+from collections import OrderedDict
+
+from krw import engine, metrics
+from krw.config import normalize_config, simulation_window
+from krw.fx import frame_fingerprint
+from krw.simulation import accumulate, align_prices, run_scenarios
+
+# ===================================#
+# 단계별 증분 계산                      #
+# ===================================#
+# 데이터 → 날짜 격자 정렬 → 납입 누적 → 이자율 적용 → 화면 표시 순서로 나누고,
+# 단계마다 그 단계가 읽는 설정 값과 앞 단계의 키만으로 만든 의존 키로 결과를 메모이제이션합니다.
+# 이자율만 바꾸면 이자율 적용 단계부터, 납입 금액만 바꾸면 납입 누적 단계부터 다시 계산합니다.
+# 데이터 단계는 PriceCache(확정 구간 영구 · 오늘 봉 TTL)가 메모이제이션하고,
+# 불러온 가격의 지문(길이 · 첫 / 마지막 날짜 · 마지막 종가)이 격자 단계 키에 들어가므로
+# 가격이 갱신되면 아래 단계가 모두 다시 계산됩니다.
+
+STAGES = ("grid", "accumulate", "rates", "presentation")
+
+# 단계별로 새로 읽는 설정 항목
+GRID_FIELDS = (
+    "asset_ticker", "overseas_investment", "time_range", "interval_option",
+    "selected_date", "purchase_period_years", "holding_period_years"
+)
+ACCUMULATE_FIELDS = ("investment_per_period",)
+RATE_FIELDS = ("interest_rate_percent", "compound_interest_rate_percent", "risk_adjustment")
+
+
+class Pipeline:
+    # 단계별 (의존 키 → 결과) LRU. 단계마다 최근 maxsize 개만 보관합니다.
+    def __init__(self, maxsize=16):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._stages = {stage: OrderedDict() for stage in STAGES}
+
+    def run(self, stage, key, fn):
+        entries = self._stages[stage]
+        with self._lock:
+            if key in entries:
+                entries.move_to_end(key)
+                metrics.incr("pipeline_stage_total", stage=stage, result="hit")
+                return entries[key]
+        metrics.incr("pipeline_stage_total", stage=stage, result="miss")
+        value = fn()
+        with self._lock:
+            entries[key] = value
+            while len(entries) > self.maxsize:
+                entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            for entries in self._stages.values():
+                entries.clear()
+
+
+def stage_keys(config, inputs):
+    # 설정과 불러온 가격으로 단계별 의존 키를 만듭니다. 뒤 단계 키는 앞 단계 키를 포함합니다.
+    data = (
+        frame_fingerprint(inputs["prices"]),
+        frame_fingerprint(inputs["usdkrw_prices"]) if inputs["usdkrw_prices"] is not None else None,
+        inputs["latest_price"], inputs["latest_exchange_rate"]
+    )
+    grid = (data, *(config[field] for field in GRID_FIELDS))
+    accumulate_key = (grid, *(config[field] for field in ACCUMULATE_FIELDS))
+    rates = (accumulate_key, *(config[field] for field in RATE_FIELDS))
+    return {"data": data, "grid": grid, "accumulate": accumulate_key, "rates": rates}
+
+
+def run_stages(pipeline, config, load_inputs):
+    # load_inputs(ticker, start, end, overseas_investment) → PriceSource.inputs 와 같은 dict
+    config = normalize_config(config)
+    _, _, start_str, end_str = simulation_window(config)
+    with metrics.span("data"):
+        inputs = load_inputs(config["asset_ticker"], start_str, end_str, config["overseas_investment"])
+    keys = stage_keys(config, inputs)
+    aligned = pipeline.run("grid", keys["grid"], lambda: align_prices(
+        config, inputs["prices"], inputs["usdkrw_prices"], inputs["latest_price"], inputs["latest_exchange_rate"]
+    ))
+    prepared = pipeline.run("accumulate", keys["accumulate"], lambda: accumulate(aligned, config))
+    # 앞 단계 결과를 재사용해도 이후 단계가 읽는 설정은 현재 값
+    prepared = {**prepared, "config": config}
+    rates = engine.rate_fan(
+        config["interest_rate_percent"], config["compound_interest_rate_percent"],
+        [0, config["risk_adjustment"], -config["risk_adjustment"]]
+    )
+    scenarios = pipeline.run("rates", keys["rates"], lambda: run_scenarios(prepared, *rates))
+    return {"keys": keys, "inputs": inputs, "prepared": prepared, "scenarios": scenarios}
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+from krw.engine import accumulate_purchases, rate_multiplier
+
+# ===================================#
+# 포트폴리오 정액 투자                  #
+# ===================================#
+# 여러 자산의 종가를 하나의 날짜 격자에 한 번 정렬해 (날짜 × 자산) 행렬로 만들고,
+# 매 기간 납입액을 비중대로 나눠 엔진에 한 번에 넘깁니다.
+
+
+def parse_weights(text):
+    # "AAPL:0.5, MSFT:0.3, ^KS11:0.2" → {"AAPL": 0.5, ...} (합계 1 로 정규화)
+    weights = {}
+    for item in text.replace("\n", ",").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        ticker, _, weight = item.partition(":")
+        weights[ticker.strip()] = weights.get(ticker.strip(), 0.0) + float(weight or 1)
+    total = sum(weights.values())
+    if not weights or total <= 0:
+        raise ValueError("티커와 비중을 'AAPL:0.5, MSFT:0.5' 형식으로 입력해주세요.")
+    return {ticker: weight / total for ticker, weight in weights.items()}
+
+
+def align_close_matrix(frames, tickers, dates):
+    # 티커별 종가를 공통 날짜 격자에 직전 값으로 맞춰 (날짜 × 자산) 행렬로 만듭니다.
+    columns = []
+    for ticker in tickers:
+        close = frames[ticker]["Close"]
+        if close.index.tz is not None and dates.tz is not None:
+            close = close.tz_convert(dates.tz)
+        elif close.index.tz is not None:
+            close = close.tz_localize(None)
+        elif dates.tz is not None:
+            close = close.tz_localize(dates.tz)
+        columns.append(close.reindex(dates, method="ffill").to_numpy(dtype=np.float64))
+    return np.column_stack(columns) if columns else np.empty((len(dates), 0))
+
+
+def simulate_portfolio(price_matrix, weights, investment_amt, interest_rate, compound_rate,
+                       conversion_years, base_prices):
+    # price_matrix: (납입 횟수 × 자산) 원화 환산 매입 가격, base_prices: 자산별 평가 가격
+    weights = np.asarray(weights, dtype=np.float64)
+    purchases = accumulate_purchases(price_matrix, investment_amt * weights)
+    multiplier = rate_multiplier(interest_rate, compound_rate, conversion_years)
+    final_units_final = purchases["total_units_purchase"] * multiplier
+    asset_values = final_units_final * np.asarray(base_prices, dtype=np.float64)
+
+    total_investment_purchase = float(np.sum(purchases["total_investment_purchase"]))
+    final_holding_value = float(np.sum(asset_values))
+    return {
+        **purchases,
+        "weights": weights,
+        "final_units_final": final_units_final,
+        "asset_values": asset_values,
+        "total_investment": total_investment_purchase,
+        "final_holding_value": final_holding_value,
+        "profit_rate": (final_holding_value - total_investment_purchase) / total_investment_purchase * 100,
+    }
+
+
+def summary_frame(tickers, result):
+    return pd.DataFrame({
+        "비중": result["weights"],
+        "총 납입 원화": result["total_investment_purchase"],
+        "평균 매입 가격": result["final_effective_price_purchase"],
+        "보유 수량": result["final_units_final"],
+        "만기 자산 가치": result["asset_values"],
+    }, index=pd.Index(tickers, name="티커"))
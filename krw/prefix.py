@@ -0,0 +1,168 @@
+import json
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+from krw.alignment import date_grid, ffill_positions, gather
+
+# ===================================#
+# 1/가격 누적합 색인 (O(1) 구간 질의)     #
+# ===================================#
+# 납입 간격(D / W / MS / AS)의 날짜 격자는 자정에 시작하면 시작일과 무관하게 같은 기준일들의 부분 집합입니다.
+# 그래서 티커 · 간격마다 전체 이력의 격자 가격과 1/가격 누적합 C 를 한 번 만들어 두면
+# [시작, 납입 종료) 구간의 매입 수량은 납입 금액 × (C[hi] - C[lo]) 로 바로 나옵니다.
+# 해외 자산은 원화 환산 공동 행렬(krw.fx)의 종가로 만든 색인을 씁니다.
+# 색인은 가격 저장소 옆 index/ 디렉터리에 .npy 로 저장해 두고, 원본 가격의 지문이 바뀌면 다시 만듭니다.
+
+INDEX_START = "1990-01-01"
+
+
+class ReciprocalIndex:
+    def __init__(self, dates, prices, prefix, invalid, tz, freq, first_day, next_point, fingerprint=None):
+        # dates: 격자 날짜(ns), prices: 격자 날짜의 ffill 종가, prefix: [0, Σ1/가격 ...] (길이 n + 1)
+        # invalid: 가격이 없거나 0 인 격자 칸 수의 누적합 (길이 n + 1)
+        # first_day: 원본 첫 행의 자정, next_point: 격자 다음 기준일 (이 둘 사이의 구간만 질의 가능)
+        self.dates = dates
+        self.prices = prices
+        self.prefix = prefix
+        self.invalid = invalid
+        self.tz = tz
+        self.freq = freq
+        self.first_day = first_day
+        self.next_point = next_point
+        self.fingerprint = fingerprint
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def grid(self):
+        index = pd.DatetimeIndex(np.asarray(self.dates).astype("datetime64[ns]"))
+        return index.tz_localize("UTC").tz_convert(self.tz) if self.tz is not None else index
+
+    def _value(self, ts):
+        ts = pd.Timestamp(ts)
+        if self.tz is not None:
+            ts = ts.tz_localize(self.tz) if ts.tzinfo is None else ts.tz_convert(self.tz)
+        return ts
+
+    def bounds(self, start, end):
+        # [start, end) 의 격자 위치 (lo, hi). 자정에 시작하지 않거나 색인 범위를 벗어나면 None
+        start, end = self._value(start), self._value(end)
+        if start != start.normalize() or start.value < self.first_day or end.value > self.next_point:
+            return None
+        lo, hi = np.searchsorted(self.dates, [start.value, end.value], side="left")
+        if self.invalid[hi] != self.invalid[lo]:
+            return None
+        return int(lo), int(hi)
+
+    def units(self, lo, hi, investment_amt=1.0):
+        # lo ~ hi - 1 번째 격자 날짜에 investment_amt 씩 납입했을 때의 매입 수량
+        return investment_amt * (self.prefix[hi] - self.prefix[lo])
+
+    def cumulative(self, lo, hi):
+        # 구간 안에서의 1/가격 누적합 배열 (engine.cumulative_reciprocal 과 같은 모양)
+        return np.asarray(self.prefix[lo + 1:hi + 1]) - self.prefix[lo]
+
+    def last_position(self, ts):
+        # ts 이하의 마지막 격자 위치 (없으면 -1)
+        return int(np.searchsorted(self.dates, self._value(ts).value, side="right")) - 1
+
+
+def build_index(frame, freq, fingerprint=None):
+    index = pd.DatetimeIndex(frame.index)
+    if len(index) == 0:
+        raise ValueError("가격 데이터가 비어 있어 색인을 만들 수 없습니다.")
+    first_day = index[0].normalize()
+    grid = date_grid(first_day, index[-1], freq, index.tz)
+    prices = gather(frame["Close"].to_numpy(), ffill_positions(index, grid))
+    with np.errstate(divide="ignore"):
+        recip = 1.0 / prices
+    bad = ~np.isfinite(recip)
+    prefix = np.concatenate(([0.0], np.cumsum(np.where(bad, 0.0, recip))))
+    invalid = np.concatenate(([0], np.cumsum(bad))).astype(np.int64)
+    # 격자 마지막 날짜 다음 기준일: 이보다 이른 끝 날짜의 구간은 격자 안에 모두 들어 있습니다.
+    last = grid[-1] if len(grid) else first_day
+    following = date_grid(last, last + pd.DateOffset(years=2), freq, index.tz)
+    next_point = following[1].value if len(following) > 1 else last.value
+    return ReciprocalIndex(grid.asi8, prices, prefix, invalid, str(index.tz) if index.tz is not None else None,
+                           freq, first_day.value, next_point, fingerprint)
+
+
+def _save_atomic(path, array):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+class IndexStore:
+    # (키, 간격) → 색인. 메모리에 두고, root 가 있으면 .npy 로 저장해 프로세스를 다시 띄워도 재사용합니다.
+    # fingerprint 가 저장된 값과 다르면(가격 갱신) 다시 만들어 덮어씁니다.
+    def __init__(self, root=None):
+        self.root = root
+        self._lock = threading.Lock()
+        self._entries = {}
+        if root:
+            os.makedirs(root, exist_ok=True)
+
+    def _paths(self, key, freq):
+        name = re.sub(r"[^A-Za-z0-9._-]", "_", f"{key}.{freq}")
+        return {part: os.path.join(self.root, f"{name}.{part}") for part in ("dates.npy", "prices.npy", "prefix.npy", "invalid.npy", "json")}
+
+    def _load(self, key, freq, fingerprint):
+        paths = self._paths(key, freq)
+        if not all(os.path.exists(p) for p in paths.values()):
+            return None
+        try:
+            with open(paths["json"], encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta["fingerprint"] != list(fingerprint):
+                return None
+            arrays = {part: np.load(paths[f"{part}.npy"], mmap_mode="r") for part in ("dates", "prices", "prefix", "invalid")}
+        except (OSError, ValueError, KeyError):
+            return None
+        return ReciprocalIndex(arrays["dates"], arrays["prices"], arrays["prefix"], arrays["invalid"],
+                               meta["tz"], freq, meta["first_day"], meta["next_point"], fingerprint)
+
+    def _save(self, key, freq, index):
+        paths = self._paths(key, freq)
+        for part in ("dates", "prices", "prefix", "invalid"):
+            _save_atomic(paths[f"{part}.npy"], np.asarray(getattr(index, part)))
+        meta = {"fingerprint": list(index.fingerprint), "tz": index.tz, "first_day": int(index.first_day), "next_point": int(index.next_point)}
+        tmp = f"{paths['json']}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, paths["json"])
+
+    def open(self, key, freq, fingerprint):
+        # 이미 만들어 둔 색인만 엽니다 (없거나 지문이 다르면 None). 배치 워커처럼 만들지 않고 읽기만 하는 쪽에서 씁니다.
+        fingerprint = tuple(_plain(v) for v in fingerprint)
+        with self._lock:
+            index = self._entries.get((key, freq))
+        if index is not None and index.fingerprint == fingerprint:
+            return index
+        index = self._load(key, freq, fingerprint) if self.root else None
+        if index is not None:
+            with self._lock:
+                self._entries[(key, freq)] = index
+        return index
+
+    def get(self, key, freq, frame, fingerprint):
+        fingerprint = tuple(_plain(v) for v in fingerprint)
+        index = self.open(key, freq, fingerprint)
+        if index is None:
+            index = build_index(frame, freq, fingerprint)
+            if self.root:
+                self._save(key, freq, index)
+            with self._lock:
+                self._entries[(key, freq)] = index
+        return index
+
+
+def _plain(value):
+    # JSON 으로 저장해도 같은 값으로 돌아오는 파이썬 스칼라
+    return value.item() if isinstance(value, np.generic) else value
@@ -0,0 +1,79 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+import schedule
+
+# ===================================#
+# 프로세스 공용 데이터 갱신 서비스         #
+# ===================================#
+# 세션마다 스레드를 띄우지 않고, 프로세스당 하나의 스케줄러 스레드가
+# 최근 사용된 티커만 주기적으로 갱신합니다. 갱신 결과는 상태 객체를
+# 통째로 교체하는 방식으로 반영되므로 읽는 쪽은 잠금 없이 읽을 수 있습니다.
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshStatus:
+    def __init__(self, last_refresh, next_refresh, results=None, errors=None):
+        self.last_refresh = last_refresh
+        self.next_refresh = next_refresh
+        self.results = results or {}
+        self.errors = errors or {}
+
+
+class RefreshService:
+    def __init__(self, refresh_fn, interval_seconds=3600, idle_seconds=None, poll_seconds=60):
+        self.refresh_fn = refresh_fn
+        self.interval_seconds = interval_seconds
+        self.idle_seconds = idle_seconds if idle_seconds is not None else interval_seconds * 2
+        self.poll_seconds = poll_seconds
+        self._scheduler = schedule.Scheduler()
+        self._last_used = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        now = datetime.now()
+        self.status = RefreshStatus(last_refresh=now, next_refresh=now + timedelta(seconds=interval_seconds))
+
+    def touch(self, *tickers):
+        # 세션이 사용 중인 티커 표시
+        now = time.monotonic()
+        with self._lock:
+            for ticker in tickers:
+                if ticker:
+                    self._last_used[ticker] = now
+
+    def active_tickers(self):
+        cutoff = time.monotonic() - self.idle_seconds
+        with self._lock:
+            self._last_used = {t: used for t, used in self._last_used.items() if used >= cutoff}
+            return sorted(self._last_used)
+
+    def run_once(self):
+        results, errors = {}, {}
+        for ticker in self.active_tickers():
+            try:
+                results[ticker] = self.refresh_fn(ticker)
+            except Exception as e:
+                logger.warning("%s 갱신 실패", ticker, exc_info=True)
+                errors[ticker] = str(e)
+        now = datetime.now()
+        self.status = RefreshStatus(now, now + timedelta(seconds=self.interval_seconds), results, errors)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._scheduler.run_pending()
+            self._stop.wait(self.poll_seconds)
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._scheduler.every(self.interval_seconds).seconds.do(self.run_once)
+            self._thread = threading.Thread(target=self._run, name="krw-refresh", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
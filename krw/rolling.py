@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from krw.engine import cumulative_reciprocal, rate_multiplier
+
+# ===================================#
+# 롤링 시작일 백테스트                   #
+# ===================================#
+# 같은 계획(납입 기간 · 전체 기간 · 간격)을 격자의 모든 시작일에 대해 실행합니다.
+# 1/가격 누적합 C 를 한 번 만들어 두면 시작 위치 i 의 매입 수량은
+# C[j] - C[i] (j = 납입 종료 위치) 이므로 전체가 O(n log n) 입니다.
+
+
+def rolling_backtest(grid_dates, grid_prices, purchase_months, total_months, investment_amt,
+                     interest_rate, compound_rate, conversion_years):
+    grid_dates = pd.DatetimeIndex(grid_dates)
+    grid_prices = np.asarray(grid_prices, dtype=np.float64)
+    recip = np.concatenate(([0.0], cumulative_reciprocal(grid_prices)))
+
+    # 시작일별 납입 종료 위치와 만기(평가) 위치
+    purchase_end = np.searchsorted(grid_dates.asi8, (grid_dates + pd.DateOffset(months=purchase_months)).asi8, side="left")
+    maturity_dates = grid_dates + pd.DateOffset(months=total_months)
+    maturity = np.searchsorted(grid_dates.asi8, maturity_dates.asi8, side="right") - 1
+
+    # 만기가 데이터 범위 안에 있고 1회 이상 납입하는 시작일만 사용
+    starts = np.arange(len(grid_dates))
+    valid = (maturity_dates <= grid_dates[-1]) & (purchase_end > starts) if len(grid_dates) else np.zeros(0, dtype=bool)
+    starts, purchase_end, maturity = starts[valid], purchase_end[valid], maturity[valid]
+
+    units = investment_amt * (recip[purchase_end] - recip[starts])
+    invested = investment_amt * (purchase_end - starts).astype(np.float64)
+    final_value = units * rate_multiplier(interest_rate, compound_rate, conversion_years) * grid_prices[maturity]
+    return {
+        "start_dates": grid_dates[starts],
+        "total_investment_purchase": invested,
+        "final_holding_value": final_value,
+        "profit_rate": (final_value - invested) / invested * 100,
+    }
+
+
+def summarize(result, percentiles=(5, 25, 50, 75, 95)):
+    profit = result["profit_rate"]
+    if len(profit) == 0:
+        return None
+    worst, best = int(np.argmin(profit)), int(np.argmax(profit))
+    return {
+        "count": len(profit),
+        "percentiles": dict(zip(percentiles, np.percentile(profit, percentiles))),
+        "mean": float(np.mean(profit)),
+        "worst": float(profit[worst]),
+        "worst_start": result["start_dates"][worst],
+        "best": float(profit[best]),
+        "best_start": result["start_dates"][best],
+        "loss_probability": float(np.mean(profit < 0)),
+    }
@@ -0,0 +1,142 @@
+import json
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+from krw.store import PRICE_COLUMNS, _day
+
+# ===================================#
+# 프로세스 간 공유 가격 배열               #
+# ===================================#
+# 티커의 확정 구간(오늘 이전) 가격을 가격 저장소 옆 shared/ 디렉터리에 .npy 로 한 번 게시해 두면
+# 같은 저장소를 쓰는 워커 프로세스들은 모두 메모리 맵으로 열어 같은 페이지 캐시를 공유합니다.
+# 구간 요청은 searchsorted 로 잘라 가격 값은 복사 없이 DataFrame 으로 감싸 돌려주므로
+# (시간대가 있는 날짜 인덱스만 잘라 낸 구간 길이만큼 새로 만듭니다)
+# 워커를 하나 더 띄워도 가격 데이터 메모리가 거의 늘지 않고, 게시된 구간은 다시 가져오지 않습니다.
+#
+# 파일: <티커>.<버전>.dates.npy (UTC ns) · <티커>.<버전>.values.npy (행 × PRICE_COLUMNS)
+#       <티커>.json (현재 버전 · 시간대 · 게시 구간)
+# 다시 게시하면 새 버전 파일을 쓴 뒤 json 을 바꿔 가리키고 이전 파일을 지웁니다.
+# 이미 열어 둔 프로세스의 메모리 맵은 지워진 뒤에도 유효하고, 다음 요청에서 새 버전을 엽니다.
+
+
+class _Attached:
+    def __init__(self, version, mtime, dates, values, tz, start, end):
+        self.version = version
+        self.mtime = mtime
+        self.dates = dates
+        self.values = values
+        self.tz = tz
+        self.start = start
+        self.end = end
+
+
+class SharedPrices:
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        self._attached = {}
+        os.makedirs(root, exist_ok=True)
+
+    def _name(self, ticker):
+        return re.sub(r"[^A-Za-z0-9._-]", "_", ticker)
+
+    def _meta_path(self, ticker):
+        return os.path.join(self.root, f"{self._name(ticker)}.json")
+
+    def _array_path(self, ticker, version, part):
+        return os.path.join(self.root, f"{self._name(ticker)}.{version}.{part}.npy")
+
+    def _read_meta(self, ticker):
+        try:
+            with open(self._meta_path(ticker), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def publish(self, ticker, frame, start, end):
+        # frame: [start, end) 의 가격 (오늘 이전 확정 구간). 같은 내용이면 다시 쓰지 않습니다.
+        start, end = _day(start), _day(end)
+        index = pd.DatetimeIndex(frame.index)
+        tz = str(index.tz) if index.tz is not None else None
+        dates = (index.tz_convert("UTC").tz_localize(None) if tz else index).asi8
+        values = frame.reindex(columns=PRICE_COLUMNS).to_numpy(dtype=np.float64)
+        meta = self._read_meta(ticker)
+        fingerprint = [len(dates)] + ([int(dates[0]), int(dates[-1]), float(values[-1, PRICE_COLUMNS.index("Close")])] if len(dates) else [])
+        if meta and meta.get("fingerprint") == fingerprint and meta.get("start") == str(start.date()) and meta.get("end") == str(end.date()):
+            return False
+        version = f"{int(pd.Timestamp.now('UTC').value)}-{os.getpid()}"
+        for part, array in (("dates", dates), ("values", values)):
+            tmp = f"{self._array_path(ticker, version, part)}.tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, array)
+            os.replace(tmp, self._array_path(ticker, version, part))
+        meta = {"version": version, "tz": tz, "start": str(start.date()), "end": str(end.date()), "fingerprint": fingerprint}
+        tmp = f"{self._meta_path(ticker)}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._meta_path(ticker))
+        self._remove_stale(ticker, version)
+        return True
+
+    def _remove_stale(self, ticker, version):
+        prefix = f"{self._name(ticker)}."
+        current = f"{prefix}{version}."
+        for entry in os.listdir(self.root):
+            if entry.startswith(prefix) and entry.endswith(".npy") and not entry.startswith(current):
+                try:
+                    os.remove(os.path.join(self.root, entry))
+                except OSError:
+                    pass
+
+    def published(self, ticker):
+        return os.path.exists(self._meta_path(ticker))
+
+    def _attach(self, ticker):
+        # 현재 게시 버전을 메모리 맵으로 열어 둡니다. json 이 바뀌었을 때만 다시 읽습니다.
+        try:
+            mtime = os.stat(self._meta_path(ticker)).st_mtime_ns
+        except OSError:
+            return None
+        with self._lock:
+            attached = self._attached.get(ticker)
+        if attached is not None and attached.mtime == mtime:
+            return attached
+        meta = self._read_meta(ticker)
+        if meta is None:
+            return None
+        if attached is not None and attached.version == meta["version"]:
+            attached.mtime = mtime
+            return attached
+        try:
+            dates = np.load(self._array_path(ticker, meta["version"], "dates"), mmap_mode="r")
+            values = np.load(self._array_path(ticker, meta["version"], "values"), mmap_mode="r")
+        except (OSError, ValueError):
+            # 다른 프로세스가 막 다시 게시한 경우: 다음 요청에서 새 버전을 엽니다.
+            return None
+        attached = _Attached(meta["version"], mtime, dates, values, meta["tz"], pd.Timestamp(meta["start"]), pd.Timestamp(meta["end"]))
+        with self._lock:
+            self._attached[ticker] = attached
+        return attached
+
+    def covers(self, ticker, start, end):
+        attached = self._attach(ticker)
+        return attached is not None and attached.start <= _day(start) and _day(end) <= attached.end
+
+    def get(self, ticker, start, end):
+        # 게시된 구간 안의 [start, end) 가격 (값은 메모리 맵 그대로), 벗어나면 None
+        start, end = _day(start), _day(end)
+        attached = self._attach(ticker)
+        if attached is None or start < attached.start or end > attached.end:
+            return None
+        bounds = [start, end]
+        if attached.tz is not None:
+            bounds = [b.tz_localize(attached.tz).tz_convert("UTC").tz_localize(None) for b in bounds]
+        lo, hi = np.searchsorted(attached.dates, [b.value for b in bounds], side="left")
+        index = pd.DatetimeIndex(np.asarray(attached.dates[lo:hi]).view("datetime64[ns]"), name="Date")
+        if attached.tz is not None:
+            index = index.tz_localize("UTC").tz_convert(attached.tz)
+        return pd.DataFrame(np.asarray(attached.values[lo:hi]), index=index, columns=PRICE_COLUMNS, copy=False)
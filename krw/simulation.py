@@ -0,0 +1,243 @@
+import numpy as np
+import pandas as pd
+
+from krw import engine, metrics
+from krw.alignment import ALIGNMENT_CACHE, align_close, date_grid, gather
+from krw.config import INTERVAL_FREQ_MAP, normalize_config, simulation_window
+from krw.fx import krw_close
+
+# ===================================#
+# 헤드리스 시뮬레이션 API                #
+# ===================================#
+# Streamlit 위젯이나 전역 변수 없이 설정 dict 와 가격 데이터만으로 계산합니다.
+# 데이터 범위 조정 같은 안내는 결과의 "warnings" 목록으로 돌려줍니다.
+
+
+def prepare(config, price_data, usdkrw_data=None, latest_price=None, latest_exchange_rate=None):
+    # 이자율과 무관한 단계: 날짜 정렬, 납입 수량 누적
+    config = normalize_config(config)
+    return accumulate(align_prices(config, price_data, usdkrw_data, latest_price, latest_exchange_rate), config)
+
+
+def align_prices(config, price_data, usdkrw_data=None, latest_price=None, latest_exchange_rate=None):
+    # 납입 금액 · 이자율과 무관한 단계: 날짜 격자와 원화 환산 가격 정렬
+    config = normalize_config(config)
+    if price_data.empty:
+        raise ValueError("가격 데이터를 불러올 수 없습니다.")
+    overseas_investment = config["overseas_investment"]
+    if overseas_investment and (usdkrw_data is None or usdkrw_data.empty):
+        raise ValueError("환율 데이터를 불러올 수 없습니다.")
+    warnings = []
+
+    start_date, end_date, _, _ = simulation_window(config)
+    if price_data.index.tz is not None:
+        tz_info = price_data.index.tz
+        if start_date.tzinfo is None:
+            start_date = start_date.tz_localize(tz_info)
+        if end_date.tzinfo is None:
+            end_date = end_date.tz_localize(tz_info)
+
+    data_min_date = price_data.index.min()
+    if start_date < data_min_date:
+        warnings.append(f"선택한 운용 기간이 데이터 범위를 벗어납니다. 적립 시작일을 {data_min_date.strftime('%Y년 %m월 %d일')}로 조정합니다.")
+        start_date = data_min_date
+
+    freq = INTERVAL_FREQ_MAP[config["interval_option"]]
+
+    with metrics.span("align"):
+        # 격자와 ffill 위치는 (티커, 간격, 구간) 별로 메모이제이션
+        # 해외 자산은 원화 환산 공동 행렬 하나에 맞추므로 국내 자산과 정렬 비용이 같습니다.
+        tz = price_data.index.tz
+        ticker = config["asset_ticker"]
+        frame = price_data
+        if overseas_investment:
+            frame = krw_close(ticker, price_data, usdkrw_data)
+            ticker = f"{ticker}/KRW"
+        all_dates = date_grid(start_date, end_date, freq, tz)
+        sampled_positions = ALIGNMENT_CACHE.positions(ticker, frame.index, all_dates, (freq, start_date, end_date, "both"))
+        effective_price_series = gather(frame["Close"].to_numpy(), sampled_positions)
+        sampled_close = gather(frame["Asset"].to_numpy(), sampled_positions) if overseas_investment else effective_price_series
+
+        months_purchase = int(round(config["purchase_period_years"] * 12))
+        purchase_end_date = start_date + pd.DateOffset(months=months_purchase)
+        purchase_dates = date_grid(start_date, purchase_end_date, freq, tz, inclusive="left")
+        effective_purchase_prices = align_close(ticker, frame, purchase_dates, (freq, start_date, purchase_end_date, "left"))
+    if len(all_dates) == 0 or len(purchase_dates) == 0:
+        # 예: 1개월 운용 기간에 1년 간격이면 납입일이 하나도 없습니다.
+        raise ValueError(f"선택한 기간에 {config['interval_option']} 간격 납입일이 없습니다. 운용 · 납입 기간을 늘리거나 납입 간격을 줄여주세요.")
+
+    latest_exchange_rate = (latest_exchange_rate or 1) if overseas_investment else 1
+    base_price = sampled_close[-1]
+    base_effective_price = base_price * latest_exchange_rate
+
+    latest_price = latest_price or base_price
+    current_effective_price = latest_price * latest_exchange_rate
+
+    return {
+        "config": config,
+        "warnings": warnings,
+        "effective_purchase_prices": effective_purchase_prices,
+        "base_price": base_price,
+        "base_effective_price": base_effective_price,
+        "current_effective_price": current_effective_price,
+        "latest_exchange_rate": latest_exchange_rate,
+        "price_frame": frame,
+        "sampled_dates": all_dates,
+        "effective_price_series": effective_price_series,
+        "purchase_dates": purchase_dates,
+        "purchase_count": len(purchase_dates),
+        "start_date": start_date,
+        "purchase_end_date": purchase_end_date,
+        "holding_end_date": purchase_end_date + pd.DateOffset(months=int(round(config["holding_period_years"] * 12))),
+        "end_date": end_date
+    }
+
+
+def accumulate(aligned, config):
+    # 납입 금액에만 의존하는 단계: 납입 수량 누적 (config 는 이후 단계가 읽을 현재 설정)
+    with metrics.span("accumulate"):
+        purchases = engine.accumulate_purchases(aligned["effective_purchase_prices"], config["investment_per_period"])
+    return {**purchases, **aligned, "config": config}
+
+
+def indexed_prepare(config, index, price_data, usdkrw_data=None, latest_price=None, latest_exchange_rate=None):
+    # prepare 와 같은 스칼라 결과를 1/가격 누적합 색인(krw.prefix)으로 O(1) 에 계산합니다.
+    # price_data / usdkrw_data 는 prepare 에 넘길 조회 구간 가격입니다.
+    # 자정에 시작하지 않거나 색인 · 조회 구간 밖을 읽어야 하는 등 같은 결과를 보장할 수 없으면 None
+    config = normalize_config(config)
+    overseas_investment = config["overseas_investment"]
+    if price_data.empty or (overseas_investment and (usdkrw_data is None or usdkrw_data.empty)):
+        return None
+    start_date, end_date, _, end_str = simulation_window(config)
+    window_end = pd.Timestamp(end_str)
+    tz_info = price_data.index.tz
+    if tz_info is not None:
+        start_date, end_date, window_end = (ts.tz_localize(tz_info) for ts in (start_date, end_date, window_end))
+
+    warnings = []
+    data_min_date = price_data.index.min()
+    if start_date < data_min_date:
+        warnings.append(f"선택한 운용 기간이 데이터 범위를 벗어납니다. 적립 시작일을 {data_min_date.strftime('%Y년 %m월 %d일')}로 조정합니다.")
+        start_date = data_min_date
+
+    purchase_end_date = start_date + pd.DateOffset(months=int(round(config["purchase_period_years"] * 12)))
+    if purchase_end_date <= start_date or purchase_end_date > window_end or end_date.value >= index.next_point:
+        return None
+    bounds = index.bounds(start_date, purchase_end_date)
+    if bounds is None or bounds[1] <= bounds[0]:
+        return None
+    lo, hi = bounds
+    last = index.last_position(end_date)
+    if last < lo:
+        return None
+
+    if overseas_investment:
+        # 기준 가격은 달러 종가: 마지막 격자 날짜 이하의 마지막 행
+        row = int(np.searchsorted(price_data.index.asi8, index.dates[last], side="right")) - 1
+        base_price = price_data["Close"].to_numpy()[row] if row >= 0 else np.nan
+    else:
+        base_price = index.prices[last]
+    latest_exchange_rate = (latest_exchange_rate or 1) if overseas_investment else 1
+    latest_price = latest_price or base_price
+
+    investment_amt = config["investment_per_period"]
+    total_units_purchase = index.units(lo, hi, investment_amt)
+    total_investment_purchase = investment_amt * (hi - lo)
+    return {
+        "config": config,
+        "warnings": warnings,
+        "total_investment_purchase": total_investment_purchase,
+        "total_units_purchase": total_units_purchase,
+        "final_effective_price_purchase": total_investment_purchase / total_units_purchase,
+        "base_price": base_price,
+        "base_effective_price": base_price * latest_exchange_rate,
+        "current_effective_price": latest_price * latest_exchange_rate,
+        "latest_exchange_rate": latest_exchange_rate,
+        "purchase_count": hi - lo,
+        "start_date": start_date,
+        "purchase_end_date": purchase_end_date,
+        "holding_end_date": purchase_end_date + pd.DateOffset(months=int(round(config["holding_period_years"] * 12))),
+        "end_date": end_date
+    }
+
+
+def run_scenarios(prepared, interest_rates, compound_rates):
+    # 준비된 납입 결과 위에 이자율 시나리오 벡터를 한 번에 적용
+    with metrics.span("scenarios"):
+        return engine.apply_rate_scenarios(
+            prepared, interest_rates, compound_rates,
+            prepared["config"]["conversion_period_years"], prepared["base_effective_price"]
+        )
+
+
+def scenario_result(prepared, scenarios, i):
+    return {
+        **prepared,
+        "final_holding_value": scenarios["final_holding_value"][i],
+        "profit_rate": scenarios["profit_rate"][i]
+    }
+
+
+def risk_scenarios(prepared):
+    # 기본 / 낙관(+리스크 조정치) / 보수(-리스크 조정치) 시나리오를 한 번에 계산
+    config = prepared["config"]
+    rates = engine.rate_fan(
+        config["interest_rate_percent"], config["compound_interest_rate_percent"],
+        [0, config["risk_adjustment"], -config["risk_adjustment"]]
+    )
+    scenarios = run_scenarios(prepared, *rates)
+    return tuple(scenario_result(prepared, scenarios, i) for i in range(3))
+
+
+def simulate(config, prices, usdkrw_prices=None, latest_price=None, latest_exchange_rate=None):
+    # 설정 dict + 가격 데이터 → 기본 / 낙관 / 보수 시나리오 요약
+    prepared = prepare(config, prices, usdkrw_prices, latest_price, latest_exchange_rate)
+    base, optimistic, pessimistic = risk_scenarios(prepared)
+    return summary(base, optimistic, pessimistic)
+
+
+def indexed_simulate(config, index, prices, usdkrw_prices=None, latest_price=None, latest_exchange_rate=None):
+    # 색인으로 답할 수 있으면 simulate 와 같은 요약, 아니면 None
+    prepared = indexed_prepare(config, index, prices, usdkrw_prices, latest_price, latest_exchange_rate)
+    if prepared is None:
+        return None
+    base, optimistic, pessimistic = risk_scenarios(prepared)
+    return summary(base, optimistic, pessimistic)
+
+
+def summary(base, optimistic, pessimistic):
+    # JSON 으로 내보낼 수 있는 스칼라 요약
+    def date_str(value):
+        return pd.Timestamp(value).strftime("%Y-%m-%d")
+
+    return {
+        "asset_ticker": base["config"]["asset_ticker"],
+        "total_investment_purchase": float(base["total_investment_purchase"]),
+        "final_holding_value": float(base["final_holding_value"]),
+        "profit_rate": float(base["profit_rate"]),
+        "final_effective_price_purchase": float(base["final_effective_price_purchase"]),
+        "total_units_purchase": float(base["total_units_purchase"]),
+        "base_price": float(base["base_price"]),
+        "current_effective_price": float(base["current_effective_price"]),
+        "optimistic_final_holding_value": float(optimistic["final_holding_value"]),
+        "optimistic_profit_rate": float(optimistic["profit_rate"]),
+        "pessimistic_final_holding_value": float(pessimistic["final_holding_value"]),
+        "pessimistic_profit_rate": float(pessimistic["profit_rate"]),
+        "purchase_count": int(base["purchase_count"]),
+        "start_date": date_str(base["start_date"]),
+        "purchase_end_date": date_str(base["purchase_end_date"]),
+        "holding_end_date": date_str(base["holding_end_date"]),
+        "end_date": date_str(base["end_date"]),
+        "warnings": base["warnings"],
+    }
+
+
+def load_and_simulate(config, source):
+    # PriceSource 로 필요한 가격을 읽어 simulate 를 실행 (CLI · 배치용)
+    config = normalize_config(config)
+    _, _, start_str, end_str = simulation_window(config)
+    inputs = source.inputs(config["asset_ticker"], start_str, end_str, config["overseas_investment"])
+    args = (inputs["prices"], inputs["usdkrw_prices"], inputs["latest_price"], inputs["latest_exchange_rate"])
+    price_index = source.reciprocal_index(config["asset_ticker"], INTERVAL_FREQ_MAP[config["interval_option"]], config["overseas_investment"])
+    result = indexed_simulate(config, price_index, *args) if price_index is not None else None
+    return result or simulate(config, *args)
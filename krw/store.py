@@ -0,0 +1,335 @@
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from krw.fetch import DEFAULT_BACKOFF, DEFAULT_RETRIES, DEFAULT_TIMEOUT, retry_call
+
+# ===================================#
+# 로컬 가격 저장소 (티커별 SQLite)        #
+# ===================================#
+# 이미 받아 둔 구간은 디스크에서 바로 잘라 주고, 비어 있는 날짜 구간만
+# 공급자(provider)에게 요청해 채워 넣습니다.
+
+logger = logging.getLogger(__name__)
+
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUNDLED_KRW_CSV = os.path.join(REPO_DIR, "krw.csv")
+DEFAULT_STORE_DIR = os.path.join(REPO_DIR, ".price_store")
+
+
+def _empty_frame():
+    return pd.DataFrame(columns=PRICE_COLUMNS, index=pd.DatetimeIndex([], name="Date"), dtype="float64")
+
+
+def _day(value):
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_localize(None)
+    return ts.normalize()
+
+
+def missing_ranges(start, end, covered):
+    # [start, end) 구간 중 covered 구간들로 덮이지 않은 부분
+    gaps = []
+    cursor = start
+    for cov_start, cov_end in sorted(covered):
+        if cov_end <= cursor:
+            continue
+        if cov_start >= end:
+            break
+        if cov_start > cursor:
+            gaps.append((cursor, min(cov_start, end)))
+        cursor = max(cursor, cov_end)
+        if cursor >= end:
+            break
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def merge_ranges(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+# --- 가격 공급자 ---
+# name 은 저장소 하위 디렉터리 이름입니다. 공급자마다 저장소를 따로 써서 대역의 합성 데이터가 실제 데이터와 섞이지 않습니다.
+class YFinanceProvider:
+    name = "yfinance"
+
+    def fetch(self, ticker, start, end):
+        import yfinance as yf
+        return yf.Ticker(ticker).history(start=start.strftime("%Y-%m-%d"), end=end.strftime("%Y-%m-%d"))
+
+    def latest(self, ticker):
+        import yfinance as yf
+        latest_data = yf.Ticker(ticker).history(period="1d")
+        return latest_data['Close'].iloc[-1] if not latest_data.empty else None
+
+    def fetch_many(self, tickers, start, end):
+        # 여러 티커를 한 번의 yf.download 요청으로 받아 티커별 프레임으로 나눕니다.
+        import yfinance as yf
+        data = yf.download(
+            list(tickers),
+            start=start.strftime("%Y-%m-%d"),
+            end=end.strftime("%Y-%m-%d"),
+            group_by="ticker",
+            auto_adjust=True,
+            ignore_tz=False,
+            progress=False,
+            threads=True,
+        )
+        frames = {}
+        for ticker in tickers:
+            if isinstance(data.columns, pd.MultiIndex) and ticker in data.columns.get_level_values(0):
+                frames[ticker] = data[ticker].dropna(how="all")
+            else:
+                frames[ticker] = _empty_frame()
+        return frames
+
+
+class FrameProvider:
+    # 네트워크 없이 미리 준비한 DataFrame(테스트 픽스처 등)을 돌려주는 공급자
+    name = "frames"
+
+    def __init__(self, frames):
+        self.frames = frames
+
+    def fetch(self, ticker, start, end):
+        frame = self.frames.get(ticker)
+        if frame is None or frame.empty:
+            return _empty_frame()
+        index = frame.index.tz_localize(None) if frame.index.tz is not None else frame.index
+        return frame[(index >= start) & (index < end)]
+
+    def latest(self, ticker):
+        frame = self.frames.get(ticker)
+        return frame["Close"].iloc[-1] if frame is not None and not frame.empty else None
+
+
+class CsvProvider(FrameProvider):
+    # 날짜/종가 두 열짜리 CSV 파일(예: krw.csv)을 읽어 오는 오프라인 공급자
+    name = "csv"
+
+    def __init__(self, paths, tz=None):
+        self.paths = paths
+        self.tz = tz
+        super().__init__({})
+
+    def _load(self, ticker):
+        if ticker not in self.frames and ticker in self.paths:
+            self.frames[ticker] = read_close_csv(self.paths[ticker], tz=self.tz)
+
+    def fetch(self, ticker, start, end):
+        self._load(ticker)
+        return super().fetch(ticker, start, end)
+
+    def latest(self, ticker):
+        self._load(ticker)
+        return super().latest(ticker)
+
+
+class StandInProvider(CsvProvider):
+    # 오프라인 테스트용 대역: 원/달러는 번들 krw.csv, 그 외 티커는 티커 이름으로 시드를 고정한
+    # 영업일 랜덤 워크를 돌려줍니다. latency 초만큼 지연시켜 느린 네트워크를 흉내 냅니다.
+    name = "standin"
+
+    def __init__(self, latency=0.0, start="1990-01-01", sleep=time.sleep):
+        super().__init__({"USDKRW=X": BUNDLED_KRW_CSV}, tz="Asia/Seoul")
+        self.latency = latency
+        self.start = start
+        self.sleep = sleep
+        self._lock = threading.Lock()
+
+    def _load(self, ticker):
+        with self._lock:
+            super()._load(ticker)
+            if ticker not in self.frames:
+                rng = np.random.default_rng(zlib.crc32(ticker.encode("utf-8")))
+                days = pd.date_range(self.start, pd.Timestamp.today().normalize(), freq="D", tz="America/New_York", name="Date")
+                index = days[days.dayofweek < 5]
+                close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, len(index))))
+                self.frames[ticker] = pd.DataFrame({"Close": close}, index=index).reindex(columns=PRICE_COLUMNS)
+
+    def fetch(self, ticker, start, end):
+        self.sleep(self.latency)
+        return super().fetch(ticker, start, end)
+
+    def latest(self, ticker):
+        self.sleep(self.latency)
+        return super().latest(ticker)
+
+
+class ResilientProvider:
+    # 공급자 호출마다 시간 제한과 지수 백오프 재시도를 적용합니다.
+    def __init__(self, provider, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+        self.provider = provider
+        self.name = getattr(provider, "name", type(provider).__name__)
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        if hasattr(provider, "fetch_many"):
+            self.fetch_many = self._fetch_many
+
+    def _call(self, fn, label):
+        return retry_call(fn, timeout=self.timeout, retries=self.retries, backoff=self.backoff, label=label)
+
+    def fetch(self, ticker, start, end):
+        return self._call(lambda: self.provider.fetch(ticker, start, end), f"{ticker} 이력")
+
+    def latest(self, ticker):
+        return self._call(lambda: self.provider.latest(ticker), f"{ticker} 최신 가격")
+
+    def _fetch_many(self, tickers, start, end):
+        return self._call(lambda: self.provider.fetch_many(tickers, start, end), f"{', '.join(tickers)} 일괄")
+
+
+def default_provider():
+    # KRW_PRICE_PROVIDER=offline 이면 네트워크 없이 번들 CSV 만 사용하고,
+    # standin 이면 모든 티커를 오프라인 대역으로 채웁니다(KRW_STANDIN_LATENCY 초 지연).
+    mode = os.environ.get("KRW_PRICE_PROVIDER", "yfinance")
+    if mode == "offline":
+        return CsvProvider({"USDKRW=X": BUNDLED_KRW_CSV}, tz="Asia/Seoul")
+    if mode == "standin":
+        return StandInProvider(latency=float(os.environ.get("KRW_STANDIN_LATENCY", "0")))
+    return ResilientProvider(YFinanceProvider())
+
+
+def read_close_csv(path, tz=None):
+    raw = pd.read_csv(path, encoding="utf-8-sig")
+    close = pd.to_numeric(raw.iloc[:, 1], errors="coerce")
+    index = pd.DatetimeIndex(pd.to_datetime(raw.iloc[:, 0]), name="Date")
+    if tz is not None:
+        index = index.tz_localize(tz)
+    frame = pd.DataFrame({"Close": close.to_numpy()}, index=index).reindex(columns=PRICE_COLUMNS)
+    return frame[frame["Close"].notna()]
+
+
+# --- 저장소 ---
+class PriceStore:
+    def __init__(self, root=None, provider=None):
+        # 실제 파일은 root 아래 공급자 이름 디렉터리에 둡니다. (색인 index/ · 공유 배열 shared/ 도 그 안)
+        self.provider = provider or default_provider()
+        base = root or os.environ.get("KRW_PRICE_STORE", DEFAULT_STORE_DIR)
+        self.root = os.path.join(base, getattr(self.provider, "name", type(self.provider).__name__))
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, ticker):
+        return os.path.join(self.root, re.sub(r"[^A-Za-z0-9._-]", "_", ticker) + ".sqlite")
+
+    @contextmanager
+    def _connect(self, ticker):
+        with self._lock:
+            conn = sqlite3.connect(self.path(ticker))
+            try:
+                with conn:
+                    conn.execute("CREATE TABLE IF NOT EXISTS bars (ts INTEGER PRIMARY KEY, open REAL, high REAL, low REAL, close REAL, volume REAL)")
+                    conn.execute("CREATE TABLE IF NOT EXISTS coverage (start TEXT, end TEXT)")
+                    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+                    yield conn
+            finally:
+                conn.close()
+
+    def _tz(self, conn):
+        row = conn.execute("SELECT value FROM meta WHERE key = 'tz'").fetchone()
+        return row[0] if row and row[0] else None
+
+    def coverage(self, ticker):
+        with self._connect(ticker) as conn:
+            rows = conn.execute("SELECT start, end FROM coverage").fetchall()
+        return [(pd.Timestamp(s), pd.Timestamp(e)) for s, e in rows]
+
+    def write(self, ticker, frame, start, end):
+        # 받아 온 구간의 봉을 저장하고, 해당 날짜 구간을 '받아 둠'으로 기록합니다.
+        # 오늘 이후 구간은 아직 확정되지 않았으므로 기록하지 않습니다.
+        # 빈 결과도 기록하지 않습니다: yfinance 는 실패 · 요청 제한도 빈 DataFrame 으로 돌려주므로
+        # 다음 요청에서 다시 가져옵니다. (같은 프로세스 안에서는 PriceCache 가 한 번만 요청합니다)
+        today = pd.Timestamp.today().normalize()
+        with self._connect(ticker) as conn:
+            tz = self._tz(conn)
+            if not frame.empty:
+                index = frame.index
+                if tz is None and index.tz is not None:
+                    tz = str(index.tz)
+                    conn.execute("INSERT OR REPLACE INTO meta VALUES ('tz', ?)", (tz,))
+                if index.tz is None and tz is not None:
+                    index = index.tz_localize(tz)
+                utc = index.tz_convert("UTC").tz_localize(None) if index.tz is not None else index
+                values = frame.reindex(columns=PRICE_COLUMNS).astype("float64")
+                rows = zip(utc.asi8.tolist(), *(values[c].where(values[c].notna(), None).tolist() for c in PRICE_COLUMNS))
+                conn.executemany("INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?)", rows)
+            covered_end = min(end, today)
+            if covered_end > start and not frame.empty:
+                ranges = [(pd.Timestamp(s), pd.Timestamp(e)) for s, e in conn.execute("SELECT start, end FROM coverage")]
+                merged = merge_ranges(ranges + [(start, covered_end)])
+                conn.execute("DELETE FROM coverage")
+                conn.executemany(
+                    "INSERT INTO coverage VALUES (?, ?)",
+                    [(s.strftime("%Y-%m-%d"), e.strftime("%Y-%m-%d")) for s, e in merged],
+                )
+
+    def read(self, ticker, start, end):
+        with self._connect(ticker) as conn:
+            tz = self._tz(conn)
+            lo = pd.Timestamp(start, tz=tz).tz_convert("UTC") if tz else pd.Timestamp(start)
+            hi = pd.Timestamp(end, tz=tz).tz_convert("UTC") if tz else pd.Timestamp(end)
+            rows = conn.execute(
+                "SELECT ts, open, high, low, close, volume FROM bars WHERE ts >= ? AND ts < ? ORDER BY ts",
+                (lo.value, hi.value),
+            ).fetchall()
+        if not rows:
+            return _empty_frame()
+        frame = pd.DataFrame(rows, columns=["ts"] + PRICE_COLUMNS)
+        index = pd.DatetimeIndex(pd.to_datetime(frame.pop("ts"), unit="ns"), name="Date")
+        if tz:
+            index = index.tz_localize("UTC").tz_convert(tz)
+        frame.index = index
+        return frame.astype("float64")
+
+    def get_many(self, tickers, start, end):
+        # 여러 티커의 [start, end) 가격. 비어 있는 구간이 있는 티커들을 모아
+        # 공급자가 지원하면 한 번의 일괄 요청(fetch_many)으로 채웁니다.
+        start, end = _day(start), _day(end)
+        gaps = {t: missing_ranges(start, end, self.coverage(t)) for t in tickers}
+        needed = [t for t in tickers if gaps[t]]
+        if needed and hasattr(self.provider, "fetch_many"):
+            lo = min(gaps[t][0][0] for t in needed)
+            hi = max(gaps[t][-1][1] for t in needed)
+            try:
+                fetched = self.provider.fetch_many(needed, lo, hi)
+            except Exception:
+                logger.warning("%s 일괄 요청에 실패해 로컬 데이터만 사용합니다.", ", ".join(needed), exc_info=True)
+                fetched = {}
+            for ticker in needed:
+                if ticker in fetched:
+                    self.write(ticker, fetched[ticker], lo, hi)
+            return {t: self.read(t, start, end) for t in tickers}
+        return {t: self.get(t, start, end) for t in tickers}
+
+    def get(self, ticker, start, end):
+        # [start, end) 구간의 가격. 비어 있는 날짜 구간만 공급자에게 요청합니다.
+        start, end = _day(start), _day(end)
+        for gap_start, gap_end in missing_ranges(start, end, self.coverage(ticker)):
+            try:
+                fetched = self.provider.fetch(ticker, gap_start, gap_end)
+            except Exception:
+                logger.warning("%s %s~%s 구간을 가져오지 못해 로컬 데이터만 사용합니다.", ticker, gap_start.date(), gap_end.date(), exc_info=True)
+                continue
+            self.write(ticker, fetched, gap_start, gap_end)
+        return self.read(ticker, start, end)
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+from krw.alignment import ALIGNMENT_CACHE, date_grid, gather
+from krw.engine import cumulative_reciprocal
+
+# ===================================#
+# 파라미터 스윕 (여러 설정 한 번에 비교)    #
+# ===================================#
+# 납입 간격별 가격 격자의 1/가격 누적합을 한 번만 계산해 두면
+# 납입 기간 P 의 매입 수량은 누적합의 한 칸을 읽는 것으로 끝납니다.
+# 유지 기간 · 이자율 축은 브로드캐스팅으로 한 번에 평가합니다.
+
+
+def purchase_counts(grid_dates, start_date, purchase_years):
+    # 납입 기간별 납입 횟수 = 격자에서 (시작일 + 납입 개월 수) 이전 날짜 개수
+    purchase_ends = pd.DatetimeIndex([start_date + pd.DateOffset(months=int(round(p * 12))) for p in purchase_years])
+    return np.searchsorted(pd.DatetimeIndex(grid_dates).asi8, purchase_ends.asi8, side="left")
+
+
+def interval_prices(prepared, freq):
+    # 기본 시뮬레이션이 정렬한 (원화 환산) 가격 행렬을 주어진 납입 간격 격자에 맞춘 (날짜, 원화 환산 가격, 평가 가격)
+    config = prepared["config"]
+    frame = prepared["price_frame"]
+    ticker = f"{config['asset_ticker']}/KRW" if config["overseas_investment"] else config["asset_ticker"]
+    grid = date_grid(prepared["start_date"], prepared["end_date"], freq, frame.index.tz)
+    grid_key = (freq, prepared["start_date"], prepared["end_date"], "both")
+    positions = ALIGNMENT_CACHE.positions(ticker, frame.index, grid, grid_key)
+    grid_prices = gather(frame["Close"].to_numpy(), positions)
+    if len(grid) == 0:
+        raise ValueError("선택한 기간에 이 납입 간격의 납입일이 없습니다.")
+    base_price = grid_prices[-1]
+    if config["overseas_investment"]:
+        base_price = gather(frame["Asset"].to_numpy(), positions)[-1] * prepared["latest_exchange_rate"]
+    return grid, grid_prices, base_price
+
+
+def sweep_interval(grid_prices, grid_dates, start_date, total_years, purchase_years, holding_years,
+                   interest_rates, compound_rates, investment_amt, base_price):
+    # 결과 배열의 축: (납입 기간, 유지 기간, 약정 이자율, 복리 이자율)
+    # 전체 운용 기간을 넘는 조합은 NaN 입니다.
+    purchase_years = np.asarray(purchase_years, dtype=np.float64)
+    holding_years = np.asarray(holding_years, dtype=np.float64)
+    interest_rates = np.asarray(interest_rates, dtype=np.float64)
+    compound_rates = np.asarray(compound_rates, dtype=np.float64)
+
+    recip = np.concatenate(([0.0], cumulative_reciprocal(grid_prices)))
+    counts = purchase_counts(grid_dates, start_date, purchase_years)
+    units = investment_amt * recip[counts]
+    invested = investment_amt * counts.astype(np.float64)
+
+    P = purchase_years[:, None, None, None]
+    H = holding_years[None, :, None, None]
+    conversion_years = total_years - P - H
+    valid = conversion_years >= -1e-9
+    growth = (1 + compound_rates[None, None, None, :] / 100) ** np.clip(conversion_years, 0, None)
+    final_value = units[:, None, None, None] * (1 + interest_rates[None, None, :, None] / 100) * growth * base_price
+    invested = np.broadcast_to(invested[:, None, None, None], final_value.shape)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        profit_rate = (final_value - invested) / invested * 100
+    final_value = np.where(valid, final_value, np.nan)
+    profit_rate = np.where(valid, profit_rate, np.nan)
+    return {
+        "total_investment_purchase": np.where(valid, invested, np.nan),
+        "final_holding_value": final_value,
+        "profit_rate": profit_rate,
+    }
+
+
+def sweep_frame(interval, purchase_years, holding_years, interest_rates, compound_rates, result):
+    # 스윕 결과를 (조합별 한 행) 표로 펼칩니다. 유효하지 않은 조합은 제외합니다.
+    axes = pd.MultiIndex.from_product(
+        [purchase_years, holding_years, interest_rates, compound_rates],
+        names=["purchase_period_years", "holding_period_years", "interest_rate_percent", "compound_interest_rate_percent"],
+    )
+    frame = pd.DataFrame({
+        "total_investment_purchase": result["total_investment_purchase"].ravel(),
+        "final_holding_value": result["final_holding_value"].ravel(),
+        "profit_rate": result["profit_rate"].ravel(),
+    }, index=axes).reset_index()
+    frame.insert(0, "interval_option", interval)
+    return frame.dropna(subset=["final_holding_value"])